@@ -0,0 +1,26 @@
+from app.agent.state import AgentState
+from app.config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def embedding_node(state: AgentState) -> dict:
+    """Embed the user's question once per turn
+
+    The vector is carried in the state so knowledge retrieval and the
+    memory search reuse it instead of embedding the same text again.
+    """
+
+    if state.get("query_embedding"):
+        return {}
+
+    try:
+        query_embedding = await settings.embedding.aembed_query(
+            state["messages"][-1].content
+        )
+    except Exception as e:
+        logger.error(f"Failed to embed user query: {e}")
+        query_embedding = []
+
+    return {"query_embedding": query_embedding}
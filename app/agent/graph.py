@@ -1,36 +1,85 @@
+from typing import Optional
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, START, END
 from app.agent.state import AgentState
+from app.agent.embedding import embedding_node
+from app.agent.history import summarize_node
 from app.agent.retrieval import retrieval_node
 from app.agent.processing import processing_node
-from app.agent.memory import memory_node
+from app.agent.memory import memory_node, memory_search_node
+from app.agent.router import (
+    ROUTE_KNOWLEDGE,
+    ROUTE_SMALL_TALK,
+    route_after_answer,
+    route_after_router,
+    router_node,
+)
+from app.agent.small_talk import small_talk_node
+from app.services.metrics import timed_node
 
 
-def create_agent_graph():
+def create_agent_graph(checkpointer: Optional[BaseCheckpointSaver] = None):
     """Create the BEJO agent workflow graph
     creates a pipeline that flows like:
-    User Question → Retrieve Knowledge → Process with LLM → Store Memory → End
+    User Question → Route → Embed Query → (Retrieve Knowledge ∥ Search User Memory)
+        → Process with LLM → (Store Memory ∥ Summarize History) → End
 
+    Knowledge retrieval and the user-memory lookup run as parallel branches,
+    so the LLM waits for the slower of the two instead of both in sequence.
+
+    The router sends greetings, thanks and acknowledgements to a short
+    small-talk prompt instead (Route → Small Talk → Summarize History), and
+    the memory write is skipped when the turn has nothing worth remembering.
+
+    With a checkpointer the state of every thread is persisted, so a call
+    with the same ``thread_id`` continues the earlier conversation.
     """
 
     # Create the graph
     graph = StateGraph(AgentState)
 
-    # Add processing nodes
-    graph.add_node("retrieval", retrieval_node)
-    graph.add_node("processing", processing_node)
-    graph.add_node("memory", memory_node)
+    # Add processing nodes, each one reports its latency to the metrics endpoint
+    graph.add_node("router", timed_node("router", router_node))
+    graph.add_node("small_talk", timed_node("small_talk", small_talk_node))
+    graph.add_node("embedding", timed_node("embedding", embedding_node))
+    graph.add_node("retrieval", timed_node("retrieval", retrieval_node))
+    graph.add_node("memory_search", timed_node("memory_search", memory_search_node))
+    graph.add_node("processing", timed_node("processing", processing_node))
+    graph.add_node("memory", timed_node("memory", memory_node))
+    graph.add_node("summarize", timed_node("summarize", summarize_node))
 
-    # Define the flow: START → retrieval → processing → memory → END
-    graph.add_edge(START, "retrieval")
-    graph.add_edge("retrieval", "processing")
-    graph.add_edge("processing", "memory")
+    # Define the flow: START → router → embedding → [retrieval, memory_search]
+    # → processing → [memory?, summarize] → END, or router → small_talk → summarize
+    graph.add_edge(START, "router")
+    graph.add_conditional_edges(
+        "router",
+        route_after_router,
+        {ROUTE_KNOWLEDGE: "embedding", ROUTE_SMALL_TALK: "small_talk"},
+    )
+    graph.add_edge("embedding", "retrieval")
+    graph.add_edge("embedding", "memory_search")
+    graph.add_edge(["retrieval", "memory_search"], "processing")
+    graph.add_conditional_edges(
+        "processing", route_after_answer, ["memory", "summarize"]
+    )
+    graph.add_edge("small_talk", "summarize")
     graph.add_edge("memory", END)
+    graph.add_edge("summarize", END)
 
     # Compile the graph into a runnable application
-    app = graph.compile()
+    app = graph.compile(checkpointer=checkpointer)
 
     return app
 
 
+def enable_persistence(checkpointer: BaseCheckpointSaver) -> None:
+    """Persist the threads of the shared graph instance with a checkpointer
+
+    The checkpointer needs a running event loop, so the API attaches it at
+    startup to the graph instance its routes already hold.
+    """
+    agent_app.checkpointer = checkpointer
+
+
 # Create the compiled graph instance
 agent_app = create_agent_graph()
@@ -0,0 +1,103 @@
+from typing import List
+from langchain_core.messages import (
+    AnyMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+)
+from app.agent.state import AgentState
+from app.config.settings import settings
+from app.services.context_builder import estimate_tokens
+from app.services.metrics import LLM_LATENCY, record_summary_tokens
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_MAX_WORDS = 200
+# Once the history passes the budget it is folded down to this share of it,
+# so the next summary is only due after several more turns
+SUMMARY_TARGET_RATIO = 0.5
+
+
+def select_recent_messages(
+    messages: List[AnyMessage], token_budget: int
+) -> List[AnyMessage]:
+    """Most recent messages that fit the token budget, starting at a user turn
+
+    The last message is always kept, even when it alone exceeds the budget.
+    """
+    recent, used = [], 0
+    for message in reversed(messages):
+        tokens = estimate_tokens(message.content)
+        if recent and used + tokens > token_budget:
+            break
+        recent.insert(0, message)
+        used += tokens
+
+    # The conversation sent to the LLM has to open with the user
+    while len(recent) > 1 and not isinstance(recent[0], HumanMessage):
+        recent.pop(0)
+    return recent
+
+
+async def summarize_node(state: AgentState) -> dict:
+    """Fold older turns into the rolling summary once the history is over budget
+
+    Nothing happens until the thread exceeds ``settings.history_token_budget``,
+    then it is folded down to ``SUMMARY_TARGET_RATIO`` of the budget, so the
+    extra LLM call is paid every few turns instead of on every turn. The
+    folded messages are removed from the thread, so the stored history and
+    the prompt stay bounded however long the conversation gets. Summary
+    tokens are counted on their own metric, not in the turn's usage.
+    """
+    messages = state["messages"]
+    budget = settings.history_token_budget
+    if sum(estimate_tokens(message.content) for message in messages) <= budget:
+        return {}
+
+    recent = select_recent_messages(messages, int(budget * SUMMARY_TARGET_RATIO))
+    older = messages[: len(messages) - len(recent)]
+    if not older:
+        return {}
+
+    transcript = "\n".join(
+        f"{'User' if isinstance(message, HumanMessage) else 'Bejo'}: {message.content}"
+        for message in older
+    )
+    prompt = [
+        SystemMessage(
+            content=(
+                "You maintain a running summary of a conversation between a user "
+                "and Bejo, an assistant. Extend the current summary with the new "
+                "lines. Keep facts, names, numbers and open questions, drop "
+                f"small talk, and answer with the summary only, in at most "
+                f"{SUMMARY_MAX_WORDS} words, in the language of the conversation."
+            )
+        ),
+        HumanMessage(
+            content=(
+                f"Current summary:\n{state.get('summary') or '(empty)'}\n\n"
+                f"New lines:\n{transcript}"
+            )
+        ),
+    ]
+
+    try:
+        with LLM_LATENCY.labels(purpose="summary").time():
+            result = await settings.llm.ainvoke(prompt)
+    except Exception as e:
+        # History stays as is, processing trims the prompt to the budget anyway
+        logger.error(f"Failed to summarize conversation history: {e}")
+        return {}
+
+    usage = getattr(result, "usage_metadata", None) or {}
+    record_summary_tokens(usage)
+    logger.info(
+        f"Summarized {len(older)} messages, keeping {len(recent)} "
+        f"(summary tokens: {usage.get('total_tokens', 0)})"
+    )
+
+    return {
+        "summary": result.content,
+        "messages": [RemoveMessage(id=message.id) for message in older],
+    }
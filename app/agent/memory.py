@@ -1,25 +1,45 @@
 from app.agent.state import AgentState
 from app.services.memory import memory_service
+from app.services.memory_writer import memory_writer
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def memory_node(state: AgentState) -> AgentState:
-    """Store conversation to user's memory"""
+async def memory_search_node(state: AgentState) -> dict:
+    """Look up the user's personal memory with the shared query vector
+
+    Runs as its own graph branch so it overlaps with knowledge retrieval.
+    """
+
+    user_memory = await memory_service.asearch_user_memory_by_vector(
+        query=state["messages"][-1].content,
+        vector=state["query_embedding"],
+        user_id=state["user_id"],
+    )
+
+    return {"user_memory": user_memory}
+
+
+async def memory_node(state: AgentState) -> dict:
+    """Queue the latest turn for storage in user's memory
+
+    The actual mem0 write happens in the background memory writer, so the
+    response is not held back by mem0's extraction pass. Earlier turns of
+    the thread were queued when they happened.
+    """
 
     try:
-        # Store the conversation in user's memory
-        success = memory_service.store_conversation(
-            messages=state["messages"], user_id=state["user_id"]
+        queued = memory_writer.enqueue(
+            messages=state["messages"][-2:], user_id=state["user_id"]
         )
 
-        if success:
-            logger.info(f"Successfully stored conversation for user {state['user_id']}")
+        if queued:
+            logger.info(f"Queued conversation for user {state['user_id']}")
         else:
-            logger.warning(f"Failed to store conversation for user {state['user_id']}")
+            logger.warning(f"Failed to queue conversation for user {state['user_id']}")
 
     except Exception as e:
         logger.error(f"Error in memory storage: {e}")
 
-    return state
+    return {}
@@ -1,27 +1,26 @@
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from app.agent.history import select_recent_messages
 from app.agent.state import AgentState
-from app.services.memory import memory_service
 from app.config.settings import settings
+from app.services.metrics import LLM_LATENCY, record_token_usage
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def processing_node(state: AgentState) -> AgentState:
+async def processing_node(state: AgentState) -> dict:
     """Process user input with LLM using memory and knowledge
 
     This is like having a conversation with someone who:
-    1. Remembers your previous conversations (user memory)
-    2. Has access to a knowledge database (retrieved knowledge)
+    1. Remembers your previous conversations (user memory, looked up in parallel)
+    2. Has access to a knowledge database (retrieved knowledge, looked up in parallel)
     3. Can give thoughtful responses based on both
-    """
 
-    # Get user's personal memory
-    user_memory = memory_service.search_user_memory(
-        query=state["messages"][-1].content, user_id=state["user_id"]
-    )
-    state["user_memory"] = user_memory
+    Earlier turns of the thread are included up to
+    ``settings.history_token_budget`` tokens, older ones only through the
+    rolling summary.
+    """
 
     # Create the prompt template
     prompt = ChatPromptTemplate.from_messages(
@@ -30,6 +29,7 @@ def processing_node(state: AgentState) -> AgentState:
                 "system",
                 "You are Bejo, an assistant that is helpful, friendly, and informative 😊.\n"
                 "If the information is not available or not clearly stated, respond politely that you do not have enough data to answer.\n\n"
+                "{conversation_summary}"
                 "Here is some relevant memory of the user:\n{user_memory}\n\n"
                 "### Supporting Knowledge:\n"
                 "Use this reference **only if it's relevant** to the user's question.\n"
@@ -43,23 +43,30 @@ def processing_node(state: AgentState) -> AgentState:
         ]
     )
 
-    MAX_CONVERSATION_HISTORY = 2
-
-    state["messages"].append(HumanMessage(content=state["messages"][-1].content))
-    limited_messages = state["messages"][-MAX_CONVERSATION_HISTORY * 2 :]
+    limited_messages = select_recent_messages(
+        state["messages"], settings.history_token_budget
+    )
+    conversation_summary = (
+        f"Summary of the earlier conversation:\n{state['summary']}\n\n"
+        if state.get("summary")
+        else ""
+    )
 
     # Format the prompt with context
     prompt_messages = prompt.format_messages(
         messages=limited_messages,
+        conversation_summary=conversation_summary,
         user_memory=state["user_memory"],
         retrieved_knowledge=state["retrieved_knowledge"],
     )
 
     try:
-        result = settings.llm.invoke(prompt_messages)
+        with LLM_LATENCY.labels(purpose="answer").time():
+            result = await settings.llm.ainvoke(prompt_messages)
         response = result.content
 
         usage = getattr(result, "usage_metadata", None) or {}
+        record_token_usage(state["category"], usage)
         state["input_tokens_usage"] += usage.get("input_tokens", 0)
         state["output_tokens_usage"] += usage.get("output_tokens", 0)
         state["total_tokens_usage"] += usage.get("total_tokens", 0)
@@ -79,6 +86,9 @@ def processing_node(state: AgentState) -> AgentState:
         state["total_tokens_usage"] += 0
 
     # Add AI response to conversation
-    state["messages"].append(AIMessage(content=response))
-
-    return state
+    return {
+        "messages": [AIMessage(content=response)],
+        "input_tokens_usage": state["input_tokens_usage"],
+        "output_tokens_usage": state["output_tokens_usage"],
+        "total_tokens_usage": state["total_tokens_usage"],
+    }
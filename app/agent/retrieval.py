@@ -1,23 +1,127 @@
-from langchain_qdrant import QdrantVectorStore
+from typing import List, Optional
+from langchain_core.documents import Document
+from qdrant_client.http.models import Filter, Fusion, FusionQuery, Prefetch
 from app.agent.state import AgentState
 from app.config.settings import settings
+from app.services.context_builder import RetrievedChunk, build_context
+from app.services.metrics import QDRANT_QUERY_LATENCY
+from app.services.sparse_encoder import encode_query
+from app.services.vector_store import (
+    SPARSE_VECTOR_NAME,
+    category_level_filter,
+    is_tiered_storage,
+    vector_store_registry,
+)
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def retrieval_node(state: AgentState) -> AgentState:
-    """Retrieve relevant knowledge based on user category
+def _to_chunk(point, collection_name: str) -> RetrievedChunk:
+    payload = point.payload or {}
+    metadata = dict(payload.get("metadata") or {})
+    metadata["_id"] = point.id
+    metadata["_collection_name"] = collection_name
+    document = Document(
+        page_content=payload.get("page_content", ""), metadata=metadata
+    )
+    vector = point.vector
+    if isinstance(vector, dict):
+        # Collections with sparse vectors return every vector by name
+        vector = vector.get("")
+    return RetrievedChunk(document=document, score=point.score, vector=vector)
+
+
+async def _query_collection(
+    collection_name: str,
+    query_embedding: List[float],
+    k: int,
+    filter: Optional[Filter],
+    query_text: Optional[str],
+) -> List[RetrievedChunk]:
+    """Dense search, or dense + BM25 sparse merged with reciprocal-rank fusion
+
+    Hybrid search is used when it is enabled and the collection stores
+    sparse vectors. Vectors are returned so the context builder can spot
+    near-duplicate chunks. Dense searches on quantized collections rescore
+    their candidates with the original vectors.
+    """
+    hybrid = bool(
+        settings.hybrid_retrieval
+        and query_text
+        and await asyncio.to_thread(
+            vector_store_registry.has_sparse_vectors, collection_name
+        )
+    )
+    params = await asyncio.to_thread(
+        vector_store_registry.search_params, collection_name
+    )
+    if hybrid:
+        search = dict(
+            prefetch=[
+                Prefetch(
+                    query=query_embedding,
+                    filter=filter,
+                    params=params,
+                    limit=settings.hybrid_prefetch_limit,
+                ),
+                Prefetch(
+                    query=encode_query(query_text),
+                    using=SPARSE_VECTOR_NAME,
+                    filter=filter,
+                    limit=settings.hybrid_prefetch_limit,
+                ),
+            ],
+            query=FusionQuery(fusion=Fusion.RRF),
+        )
+    else:
+        search = dict(query=query_embedding, query_filter=filter, search_params=params)
+
+    with QDRANT_QUERY_LATENCY.labels(
+        collection=collection_name, mode="hybrid" if hybrid else "dense"
+    ).time():
+        response = await vector_store_registry.async_client.query_points(
+            collection_name=collection_name,
+            limit=k,
+            with_payload=True,
+            with_vectors=True,
+            **search,
+        )
+    return [_to_chunk(point, collection_name) for point in response.points]
+
+
+async def _search_collection(
+    collection_name: str,
+    query_embedding: List[float],
+    k: int = 2,
+    filter: Optional[Filter] = None,
+    query_text: Optional[str] = None,
+) -> List[RetrievedChunk]:
+    """Search a single knowledge collection (top 2 documents by default)"""
+    try:
+        qdrant = await asyncio.to_thread(
+            vector_store_registry.get_store, collection_name
+        )
+        if qdrant is None:
+            logger.warning(f"Collection {collection_name} does not exist")
+            return []
 
-    Think of this like having different levels of library access:
-    - Category 1: Basic books only
-    - Category 2: Basic + Intermediate books
-    - Category 3: Basic + Intermediate + Advanced books
-    - Category 4: All books including Expert level
+        results = await _query_collection(
+            collection_name, query_embedding, k, filter, query_text
+        )
+        logger.info(f"Retrieved {len(results)} documents from {collection_name}")
+        return results
 
-    Higher category users get access to more detailed information.
-    """
-    category = state["category"]
+    except Exception as e:
+        logger.warning(f"Failed to query {collection_name}: {e}")
+        return []
+
+
+async def _search_level_collections(
+    category: int, query_embedding: List[float], query_text: Optional[str] = None
+) -> List[RetrievedChunk]:
+    """Search every per-level collection the user category may read"""
 
     # Define knowledge levels based on user category
     collection_mapping = {
@@ -39,43 +143,63 @@ def retrieval_node(state: AgentState) -> AgentState:
     collection_names = collection_mapping.get(category, ["bejo-knowledge-level-1"])
     all_results = []
 
-    # Search each accessible knowledge collection
-    for collection_name in collection_names:
-        try:
-            qdrant = QdrantVectorStore.from_existing_collection(
-                embedding=settings.embedding,
-                collection_name=collection_name,
-                url=settings.qdrant_url,
-            )
-
-            # Search for relevant documents (top 2 from each collection)
-            results = qdrant.similarity_search(state["messages"][-1].content, k=2)
-            all_results.extend(results)
-
-            logger.info(f"Retrieved {len(results)} documents from {collection_name}")
-
-        except Exception as e:
-            logger.warning(f"Failed to query {collection_name}: {e}")
-
-    # Combine all retrieved knowledge into one string
-    retrieved_knowledge = "\n\n".join(
-        [
-            f"{doc.page_content}\n(Source: {doc.metadata.get('source', 'unknown')})"
-            for doc in all_results
+    # Search every accessible knowledge collection at the same time
+    for results in await asyncio.gather(
+        *[
+            _search_collection(collection_name, query_embedding, query_text=query_text)
+            for collection_name in collection_names
         ]
-    )
+    ):
+        all_results.extend(results)
 
-    if not retrieved_knowledge:
-        retrieved_knowledge = (
-            "I'm sorry, I don't have any relevant information for your question."
-        )
+    return all_results
+
+
+async def retrieval_node(state: AgentState) -> dict:
+    """Retrieve relevant knowledge based on user category
+
+    Think of this like having different levels of library access:
+    - Category 1: Basic books only
+    - Category 2: Basic + Intermediate books
+    - Category 3: Basic + Intermediate + Advanced books
+    - Category 4: All books including Expert level
+
+    Higher category users get access to more detailed information.
 
-    # Remove duplicates
-    retrieved_knowledge = "\n\n".join(set(retrieved_knowledge.split("\n\n")))
+    In tiered storage mode all levels share one collection, so a single
+    filtered search returns the globally best chunks the user may read.
+
+    The context keeps chunks in relevance order, drops duplicates and near
+    duplicates and stops at ``settings.context_token_budget`` tokens.
+    """
+    category = state["category"]
+    query_text = state["messages"][-1].content
+
+    # Without a query vector there is nothing to search with
+    if not state["query_embedding"]:
+        all_results = []
+    elif is_tiered_storage():
+        all_results = await _search_collection(
+            settings.tiered_collection_name,
+            state["query_embedding"],
+            k=settings.retrieval_top_k,
+            filter=category_level_filter(category),
+            query_text=query_text,
+        )
+    else:
+        all_results = await _search_level_collections(
+            category, state["query_embedding"], query_text
+        )
 
-    print(retrieved_knowledge)
+    # Keep the best distinct chunks that fit the context budget, in relevance order
+    retrieved_knowledge, context_tokens = build_context(all_results)
 
-    state["retrieved_knowledge"] = retrieved_knowledge
-    logger.info(f"Total retrieved documents: {len(all_results)}")
+    logger.info(
+        f"Total retrieved documents: {len(all_results)}, "
+        f"context tokens: {context_tokens}"
+    )
 
-    return state
+    return {
+        "retrieved_knowledge": retrieved_knowledge,
+        "context_tokens": context_tokens,
+    }
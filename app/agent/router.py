@@ -0,0 +1,186 @@
+from typing import Dict, List, Tuple
+from langchain_core.messages import AIMessage
+from app.agent.state import AgentState
+from app.config.settings import settings
+from app.services.metrics import ROUTE_DECISIONS
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+ROUTE_SMALL_TALK = "small_talk"
+ROUTE_KNOWLEDGE = "knowledge"
+
+# Greetings, thanks, acknowledgements and goodbyes (Indonesian and English)
+# that need neither knowledge nor the user's memory to answer, by intent
+INTENT_GREETING = "greeting"
+INTENT_THANKS = "thanks"
+INTENT_ACKNOWLEDGEMENT = "acknowledgement"
+INTENT_GOODBYE = "goodbye"
+
+SMALL_TALK_PHRASES = {
+    INTENT_GREETING: [
+        "hi", "hello", "hey", "halo", "hallo", "hai", "hei", "pagi", "siang",
+        "sore", "malam", "selamat pagi", "selamat siang", "selamat sore",
+        "selamat malam", "good morning", "good afternoon", "good evening",
+        "assalamualaikum", "apa kabar", "how are you", "permisi",
+    ],
+    INTENT_THANKS: [
+        "thanks", "thank you", "thank u", "thx", "ty", "tq", "makasih",
+        "terima kasih", "trims", "suwun", "matur nuwun", "nuhun", "thanks a lot",
+        "terimakasih",
+    ],
+    INTENT_ACKNOWLEDGEMENT: [
+        "noted", "got it", "i see", "mantap", "mantul", "paham", "mengerti", "oh",
+        "oh begitu", "begitu", "cool", "nice", "great", "good", "keren", "wow",
+    ],
+    INTENT_GOODBYE: [
+        "bye", "goodbye", "dadah", "sampai jumpa", "see you", "selamat tinggal",
+    ],
+}
+
+# Yes/no replies, small talk only when Bejo did not just ask a question
+# (then they answer it and need the knowledge path)
+REPLY_PHRASES = [
+    "yes", "ya", "iya", "yup", "no", "tidak", "gak", "nggak", "sure", "boleh",
+    "ok", "okay", "oke", "okey", "okie", "sip", "siap", "baik", "baiklah", "alright",
+]
+
+# The intent a message is answered for when it mixes several, e.g.
+# "oke makasih, bye" is a goodbye
+INTENT_PRIORITY = [
+    INTENT_GOODBYE,
+    INTENT_THANKS,
+    INTENT_GREETING,
+    INTENT_ACKNOWLEDGEMENT,
+]
+
+# Words that may accompany small talk without making it a question
+FILLER_WORDS = [
+    "bejo", "kak", "ka", "min", "bro", "sis", "gan", "pak", "bu", "mas", "mbak",
+    "deh", "dong", "ya", "yah", "nih", "sih", "kok", "lah", "juga", "banyak",
+    "sekali", "much", "very", "so", "all", "everyone", "semua", "sudah", "udah",
+    "kalau", "gitu", "ok", "then",
+]
+
+# A message longer than this is never treated as small talk
+SMALL_TALK_MAX_WORDS = 8
+
+
+def _normalize(text: str) -> List[str]:
+    """Lowercase words without punctuation, with stretched letters collapsed
+
+    Only runs of three or more are collapsed, so "Makasihhh!!" and
+    "makasih" match the same phrase while "good" stays "good".
+    """
+    text = re.sub(r"[^a-z\s]", " ", text.lower())
+    text = re.sub(r"([a-z])\1{2,}", r"\1", text)
+    return text.split()
+
+
+def _phrases(phrases: Dict[str, List[str]]) -> List[Tuple[tuple, str]]:
+    """(normalized phrase, intent) pairs, longest phrases first"""
+    return sorted(
+        {
+            (tuple(_normalize(phrase)), intent)
+            for intent, intent_phrases in phrases.items()
+            for phrase in intent_phrases
+        },
+        key=lambda pair: len(pair[0]),
+        reverse=True,
+    )
+
+
+_PHRASES = _phrases(SMALL_TALK_PHRASES)
+_PHRASES_WITH_REPLIES = _phrases({**SMALL_TALK_PHRASES, "reply": REPLY_PHRASES})
+_FILLERS = {word for phrase in FILLER_WORDS for word in _normalize(phrase)}
+
+
+def _match_intents(text: str, after_question: bool) -> List[str]:
+    """Intents of the phrases a small talk message consists of, empty otherwise"""
+    words = _normalize(text)
+    if not words or len(words) > SMALL_TALK_MAX_WORDS:
+        return []
+
+    phrases = _PHRASES if after_question else _PHRASES_WITH_REPLIES
+    intents = []
+    i = 0
+    while i < len(words):
+        for phrase, intent in phrases:
+            if tuple(words[i : i + len(phrase)]) == phrase:
+                i += len(phrase)
+                intents.append(intent)
+                break
+        else:
+            if words[i] not in _FILLERS:
+                return []
+            i += 1
+    return intents
+
+
+def is_small_talk(text: str, after_question: bool = False) -> bool:
+    """Whether a message is only greetings, thanks or acknowledgements
+
+    With ``after_question`` yes/no replies do not count, they answer the
+    question Bejo asked.
+    """
+    return bool(_match_intents(text, after_question))
+
+
+def small_talk_intent(text: str) -> str:
+    """What a small talk message mostly is, a yes/no reply counts as acknowledgement"""
+    intents = _match_intents(text, after_question=False)
+    return next(
+        (intent for intent in INTENT_PRIORITY if intent in intents),
+        INTENT_ACKNOWLEDGEMENT,
+    )
+
+
+def _asked_question(messages: List) -> bool:
+    """Whether the message before the user's turn is Bejo asking a question
+
+    Trailing emoji, closing punctuation and whitespace are ignored, so
+    "Mau saya jelaskan prosedurnya? 😊" still counts as a question.
+    """
+    if len(messages) < 2 or not isinstance(messages[-2], AIMessage):
+        return False
+    text = re.sub(r"[^\w?？]+$", "", str(messages[-2].content))
+    return text.endswith(("?", "？"))
+
+
+def classify_turn(text: str, after_question: bool = False) -> str:
+    if is_small_talk(text, after_question):
+        return ROUTE_SMALL_TALK
+    return ROUTE_KNOWLEDGE
+
+
+def worth_remembering(text: str, route: str) -> bool:
+    """Whether the turn may carry something about the user that mem0 should keep"""
+    return route == ROUTE_KNOWLEDGE and len(text.split()) >= settings.memory_min_words
+
+
+async def router_node(state: AgentState) -> dict:
+    """Decide with local rules which path the turn takes
+
+    Small talk skips the query embedding, knowledge retrieval, the memory
+    search and the memory write. The decision is kept in the state.
+    """
+    text = state["messages"][-1].content
+    route = classify_turn(text, _asked_question(state["messages"]))
+    store_memory = worth_remembering(text, route)
+
+    ROUTE_DECISIONS.labels(route=route).inc()
+    logger.info(f"Routed turn of user {state['user_id']} to {route}")
+
+    return {"route": route, "store_memory": store_memory}
+
+
+def route_after_router(state: AgentState) -> str:
+    return state["route"]
+
+
+def route_after_answer(state: AgentState) -> List[str]:
+    """Summarize every turn, queue the memory write only when it is worth it"""
+    if state["store_memory"]:
+        return ["memory", "summarize"]
+    return ["summarize"]
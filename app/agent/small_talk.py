@@ -0,0 +1,71 @@
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from app.agent.history import select_recent_messages
+from app.agent.router import (
+    INTENT_ACKNOWLEDGEMENT,
+    INTENT_GOODBYE,
+    INTENT_GREETING,
+    INTENT_THANKS,
+    small_talk_intent,
+)
+from app.agent.state import AgentState
+from app.config.settings import settings
+from app.services.metrics import LLM_LATENCY, record_token_usage
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Only the last exchange or two, enough to answer "thanks" in context
+SMALL_TALK_HISTORY_TOKENS = 300
+
+# Canned replies when the LLM call fails, by what the user said
+FALLBACK_REPLIES = {
+    INTENT_GREETING: "Halo! Ada yang bisa saya bantu? 😊",
+    INTENT_THANKS: "Sama-sama! Senang bisa membantu 😊",
+    INTENT_ACKNOWLEDGEMENT: "Baik! Kabari saya kalau ada yang ingin ditanyakan lagi 😊",
+    INTENT_GOODBYE: "Sampai jumpa! Jangan ragu kembali kalau butuh bantuan 😊",
+}
+
+
+async def small_talk_node(state: AgentState) -> dict:
+    """Answer greetings, thanks and acknowledgements with a short prompt
+
+    No knowledge, memory or conversation summary goes into the prompt.
+    """
+
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            (
+                "system",
+                "You are Bejo, an assistant that is helpful, friendly, and informative 😊.\n"
+                "The user is greeting, thanking or acknowledging you. Reply briefly and warmly "
+                "in one or two sentences, in the user's language, and offer further help.",
+            ),
+            MessagesPlaceholder(variable_name="messages"),
+        ]
+    )
+    prompt_messages = prompt.format_messages(
+        messages=select_recent_messages(state["messages"], SMALL_TALK_HISTORY_TOKENS)
+    )
+
+    try:
+        with LLM_LATENCY.labels(purpose="small_talk").time():
+            result = await settings.llm.ainvoke(prompt_messages)
+        response = result.content
+
+        usage = getattr(result, "usage_metadata", None) or {}
+        record_token_usage(state["category"], usage)
+        state["input_tokens_usage"] += usage.get("input_tokens", 0)
+        state["output_tokens_usage"] += usage.get("output_tokens", 0)
+        state["total_tokens_usage"] += usage.get("total_tokens", 0)
+
+    except Exception as e:
+        logger.error(f"Small talk LLM call failed: {e}")
+        response = FALLBACK_REPLIES[small_talk_intent(state["messages"][-1].content)]
+
+    return {
+        "messages": [AIMessage(content=response)],
+        "input_tokens_usage": state["input_tokens_usage"],
+        "output_tokens_usage": state["output_tokens_usage"],
+        "total_tokens_usage": state["total_tokens_usage"],
+    }
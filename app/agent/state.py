@@ -1,15 +1,26 @@
-from typing import TypedDict, List, Union
-from langchain_core.messages import HumanMessage, AIMessage
+from typing import Annotated, TypedDict, List
+from langchain_core.messages import AnyMessage
+from langgraph.graph.message import add_messages
 
 
 class AgentState(TypedDict):
-    """State definition for the BEJO agent workflow"""
+    """State definition for the BEJO agent workflow
 
-    messages: List[Union[HumanMessage, AIMessage]]
+    ``messages`` and ``summary`` are persisted per thread by the checkpointer,
+    new messages are appended to the history instead of replacing it.
+    ``route`` and ``store_memory`` hold the router's decision for the turn.
+    """
+
+    messages: Annotated[List[AnyMessage], add_messages]
+    summary: str
     input_tokens_usage: int
     output_tokens_usage: int
     total_tokens_usage: int
     user_memory: str
     retrieved_knowledge: str
+    context_tokens: int
+    query_embedding: List[float]
     category: int
     user_id: str
+    route: str
+    store_memory: bool
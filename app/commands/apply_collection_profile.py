@@ -0,0 +1,223 @@
+"""Apply a collection profile (quantization, on-disk storage, HNSW) to existing collections
+
+Usage:
+    python -m app.commands.apply_collection_profile [--profile balanced]
+        [--include-memory] [--dry-run] [--wait-timeout 600]
+
+Profiles are defined in ``settings.collection_profiles``, the configured
+one (``QDRANT_COLLECTION_PROFILE``) is used by default. The keyword payload
+indexes are created where missing. Qdrant rebuilds the segments in the
+background, the command waits for every collection to turn green and then
+reports the estimated RAM of each collection before and after, plus the
+resident memory of the Qdrant process when its metrics are reachable.
+
+The API reads the quantization of a collection once to decide whether
+searches rescore, restart it after changing the quantization.
+"""
+
+from typing import Optional
+from app.config.settings import settings
+from app.services.vector_store import (
+    collection_profile,
+    collection_quantization,
+    knowledge_collection_names,
+    vector_store_registry,
+)
+import argparse
+import json
+import logging
+import math
+import time
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+# Points whose payload is measured to estimate the payload size
+PAYLOAD_SAMPLE_SIZE = 100
+
+
+def _dense_params(info):
+    vectors = info.config.params.vectors
+    return vectors.get("") if isinstance(vectors, dict) else vectors
+
+
+def _average_payload_bytes(collection_name: str) -> float:
+    points, _ = vector_store_registry.client.scroll(
+        collection_name=collection_name,
+        limit=PAYLOAD_SAMPLE_SIZE,
+        with_payload=True,
+        with_vectors=False,
+    )
+    if not points:
+        return 0.0
+    return sum(len(json.dumps(point.payload or {})) for point in points) / len(points)
+
+
+def estimate_ram(
+    points: int,
+    dims: int,
+    on_disk_vectors: bool,
+    quantization: Optional[str],
+    hnsw_m: int,
+    payload_bytes: float,
+    on_disk_payload: bool,
+) -> dict:
+    """Estimated RAM of a collection in bytes, by component
+
+    Original vectors are float32, scalar quantization keeps one byte and
+    binary quantization one bit per dimension, always in RAM. The HNSW
+    graph holds ``2 * m`` four-byte links per point on its base layer.
+    """
+    return {
+        "vectors": 0 if on_disk_vectors else points * dims * 4,
+        "quantized": {
+            "scalar": points * dims,
+            "binary": points * math.ceil(dims / 8),
+        }.get(quantization, 0),
+        "hnsw": points * hnsw_m * 2 * 4,
+        "payload": 0 if on_disk_payload else int(points * payload_bytes),
+    }
+
+
+def current_estimate(collection_name: str, payload_bytes: float) -> dict:
+    info = vector_store_registry.client.get_collection(collection_name)
+    dense = _dense_params(info)
+    hnsw = dense.hnsw_config or info.config.hnsw_config
+    return estimate_ram(
+        points=info.points_count or 0,
+        dims=dense.size,
+        on_disk_vectors=bool(dense.on_disk),
+        quantization=collection_quantization(info),
+        hnsw_m=hnsw.m,
+        payload_bytes=payload_bytes,
+        on_disk_payload=bool(info.config.params.on_disk_payload),
+    )
+
+
+def profile_estimate(collection_name: str, profile: dict, payload_bytes: float) -> dict:
+    info = vector_store_registry.client.get_collection(collection_name)
+    return estimate_ram(
+        points=info.points_count or 0,
+        dims=_dense_params(info).size,
+        on_disk_vectors=profile["on_disk_vectors"],
+        quantization=profile["quantization"],
+        hnsw_m=profile["hnsw_m"],
+        payload_bytes=payload_bytes,
+        on_disk_payload=profile["on_disk_payload"],
+    )
+
+
+def qdrant_resident_bytes() -> Optional[int]:
+    """Resident memory of the Qdrant process from its Prometheus metrics"""
+    request = urllib.request.Request(f"{settings.qdrant_url}/metrics")
+    if settings.qdrant_api_key:
+        request.add_header("api-key", settings.qdrant_api_key)
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            for line in response.read().decode("utf-8").splitlines():
+                if line.startswith("memory_resident_bytes"):
+                    return int(float(line.split()[-1]))
+    except Exception as e:
+        logger.info(f"Qdrant process memory not available: {e}")
+    return None
+
+
+def wait_until_green(collection_name: str, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = vector_store_registry.client.get_collection(collection_name)
+        if info.status == "green":
+            return True
+        time.sleep(2)
+    return False
+
+
+def _mib(size: float) -> str:
+    return f"{size / (1024 * 1024):9.1f} MiB"
+
+
+def apply(
+    profile_name: Optional[str] = None,
+    include_memory: bool = False,
+    dry_run: bool = False,
+    wait_timeout: float = 600,
+) -> dict:
+    """Apply a profile to every existing knowledge (and memory) collection
+
+    Returns the before/after RAM estimate per collection.
+    """
+    profile_name = profile_name or settings.collection_profile
+    profile = collection_profile(profile_name)
+    client = vector_store_registry.client
+
+    names = knowledge_collection_names()
+    if include_memory:
+        names.append(settings.memory_config["vector_store"]["config"]["collection_name"])
+    names = [name for name in names if client.collection_exists(name)]
+
+    resident_before = qdrant_resident_bytes()
+    report = {}
+    for name in names:
+        payload_bytes = _average_payload_bytes(name)
+        before = current_estimate(name, payload_bytes)
+        if dry_run:
+            after = profile_estimate(name, profile, payload_bytes)
+        else:
+            vector_store_registry.apply_profile(name, profile)
+            logger.info(f"Applied profile {profile_name} to {name}, waiting for optimization")
+            if not wait_until_green(name, wait_timeout):
+                logger.warning(f"{name} is still optimizing, its estimate may be early")
+            after = current_estimate(name, payload_bytes)
+        report[name] = {"before": before, "after": after}
+
+    print(f"\nProfile {profile_name}{' (dry run)' if dry_run else ''}, estimated RAM:")
+    print(f"{'collection':<24}{'before':>14}{'after':>14}")
+    for name, sizes in report.items():
+        before, after = sum(sizes["before"].values()), sum(sizes["after"].values())
+        print(f"{name:<24}{_mib(before):>14}{_mib(after):>14}")
+    total_before = sum(sum(s["before"].values()) for s in report.values())
+    total_after = sum(sum(s["after"].values()) for s in report.values())
+    print(f"{'total':<24}{_mib(total_before):>14}{_mib(total_after):>14}")
+
+    if not dry_run:
+        resident_after = qdrant_resident_bytes()
+        if resident_before is not None and resident_after is not None:
+            print(
+                f"Qdrant resident memory: {_mib(resident_before).strip()} -> "
+                f"{_mib(resident_after).strip()}"
+            )
+        print("Restart the API so its searches follow the new quantization")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--profile",
+        choices=sorted(settings.collection_profiles),
+        default=settings.collection_profile,
+    )
+    parser.add_argument(
+        "--include-memory",
+        action="store_true",
+        help="Also apply the profile to mem0's memory collection",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report the estimated RAM the profile would use",
+    )
+    parser.add_argument("--wait-timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    apply(
+        profile_name=args.profile,
+        include_memory=args.include_memory,
+        dry_run=args.dry_run,
+        wait_timeout=args.wait_timeout,
+    )
+    vector_store_registry.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Copy the per-level knowledge collections into the single tiered collection
+
+Usage:
+    python -m app.commands.migrate_tiered [--batch-size 256] [--drop-source]
+
+Points keep their IDs and vectors, and their ``metadata.category_level``
+payload is set from the level of the source collection, so the migration is
+safe to re-run. Points without a BM25 sparse vector get one computed from
+their text, so the tiered collection supports hybrid retrieval.
+"""
+
+from qdrant_client.http.models import PointStruct
+from app.config.settings import settings
+from app.services.sparse_encoder import encode_document
+from app.services.vector_store import (
+    KNOWLEDGE_LEVELS,
+    SPARSE_VECTOR_NAME,
+    knowledge_collection_name,
+    vector_store_registry,
+)
+import argparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def migrate(batch_size: int = 256, drop_source: bool = False) -> int:
+    """Copy every per-level collection into the tiered collection"""
+    client = vector_store_registry.client
+    target = settings.tiered_collection_name
+
+    if vector_store_registry.get_store(target) is None:
+        vector_store_registry.create_collection(target)
+        logger.info(f"Created tiered collection {target}")
+    with_sparse = vector_store_registry.has_sparse_vectors(target)
+
+    total = 0
+    for level in KNOWLEDGE_LEVELS:
+        source = knowledge_collection_name(level)
+        if not client.collection_exists(source):
+            logger.info(f"Collection {source} not found, skipping")
+            continue
+
+        copied = 0
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=source,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            if not points:
+                break
+
+            batch = []
+            for point in points:
+                payload = point.payload or {}
+                payload.setdefault("metadata", {})["category_level"] = level
+                vector = point.vector
+                if with_sparse and not isinstance(vector, dict):
+                    vector = {
+                        "": vector,
+                        SPARSE_VECTOR_NAME: encode_document(
+                            payload.get("page_content", "")
+                        ),
+                    }
+                batch.append(PointStruct(id=point.id, vector=vector, payload=payload))
+            client.upsert(collection_name=target, points=batch)
+            copied += len(batch)
+
+            if offset is None:
+                break
+
+        logger.info(f"Copied {copied} points from {source} to {target}")
+        total += copied
+
+        if drop_source:
+            vector_store_registry.drop_collection(source)
+            logger.info(f"Dropped {source}")
+
+    logger.info(f"Migration finished, {total} points copied to {target}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument(
+        "--drop-source",
+        action="store_true",
+        help="Delete the per-level collections after copying them",
+    )
+    args = parser.parse_args()
+
+    migrate(batch_size=args.batch_size, drop_source=args.drop_source)
+    vector_store_registry.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Register the files already stored in Qdrant in the local file hash index
+
+Usage:
+    python -m app.commands.rebuild_hash_index [--batch-size 256]
+
+Needed once for knowledge ingested before uploads were deduplicated against
+the local index. Entries that already exist are left untouched.
+"""
+
+from app.services.file_index import file_hash_index
+from app.services.vector_store import (
+    knowledge_collection_names,
+    vector_store_registry,
+)
+import argparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild(batch_size: int = 256) -> int:
+    """Scan every knowledge collection and index the file hashes it contains"""
+    client = vector_store_registry.client
+    added = 0
+
+    for collection_name in knowledge_collection_names():
+        if not client.collection_exists(collection_name):
+            logger.info(f"Collection {collection_name} not found, skipping")
+            continue
+
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=[
+                    "metadata.file_hash",
+                    "metadata.category_level",
+                    "metadata.filename",
+                ],
+                with_vectors=False,
+            )
+            for point in points:
+                metadata = (point.payload or {}).get("metadata", {})
+                if metadata.get("file_hash") and metadata.get("category_level"):
+                    added += file_hash_index.add(
+                        metadata["file_hash"],
+                        int(metadata["category_level"]),
+                        metadata.get("filename", ""),
+                    )
+
+            if offset is None:
+                break
+
+        logger.info(f"Indexed file hashes from {collection_name}")
+
+    logger.info(f"Hash index rebuilt, {added} new files registered")
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    rebuild(batch_size=args.batch_size)
+    vector_store_registry.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from mem0 import Memory
+from app.services.embedding_cache import CachedEmbeddings
 from dotenv import load_dotenv
+from urllib.parse import urlparse
+import threading
 import os
 import logging
 
@@ -19,8 +20,137 @@ class Settings:
         # Model configurations
         self.llm_model = "gemini-2.0-flash"
         self.embedding_model = "models/text-embedding-004"
+        self.embedding_dims = 768
         self.llm_temperature = 0.7
-        self.qdrant_url = "http://localhost:6333"
+        # Qdrant connection, shared by retrieval, ingestion and mem0. gRPC
+        # (port 6334) is cheaper to serialize for bulk upserts and searches,
+        # it is opt-in since many deployments only expose the HTTP port
+        self.qdrant_url = os.getenv("QDRANT_URL", "http://localhost:6333")
+        self.qdrant_api_key = os.getenv("QDRANT_API_KEY") or None
+        self.qdrant_prefer_grpc = os.getenv("QDRANT_PREFER_GRPC", "false") == "true"
+        self.qdrant_grpc_port = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+        self.qdrant_timeout = int(os.getenv("QDRANT_TIMEOUT", "30"))
+
+        # Local state (embedding cache, ...) lives under the data directory
+        self.data_dir = os.getenv(
+            "BEJO_DATA_DIR",
+            os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data")),
+        )
+        self.ingestion_jobs_db = os.path.join(self.data_dir, "ingestion_jobs.sqlite3")
+        self.conversations_db = os.path.join(self.data_dir, "conversations.sqlite3")
+        self.ingestion_max_workers = int(os.getenv("INGESTION_MAX_WORKERS", "2"))
+        self.ingestion_embed_batch_size = int(
+            os.getenv("INGESTION_EMBED_BATCH_SIZE", "64")
+        )
+        self.ingestion_embed_concurrency = int(
+            os.getenv("INGESTION_EMBED_CONCURRENCY", "4")
+        )
+        self.ingestion_embed_max_retries = int(
+            os.getenv("INGESTION_EMBED_MAX_RETRIES", "5")
+        )
+        self.ingestion_embed_backoff = float(
+            os.getenv("INGESTION_EMBED_BACKOFF", "2.0")
+        )
+        self.bulk_ingestion_queue_size = int(
+            os.getenv("BULK_INGESTION_QUEUE_SIZE", "2")
+        )
+        # Limits on a zip archive in a bulk upload, checked against the sizes
+        # declared in the archive before anything is extracted
+        self.bulk_zip_max_members = int(os.getenv("BULK_ZIP_MAX_MEMBERS", "500"))
+        self.bulk_zip_max_member_bytes = int(
+            os.getenv("BULK_ZIP_MAX_MEMBER_BYTES", str(100 * 1024 * 1024))
+        )
+        self.bulk_zip_max_total_bytes = int(
+            os.getenv("BULK_ZIP_MAX_TOTAL_BYTES", str(1024 * 1024 * 1024))
+        )
+        self.ingestion_converters = int(os.getenv("INGESTION_CONVERTERS", "1"))
+        self.embedding_cache_memory_items = int(
+            os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "5000")
+        )
+
+        # Knowledge storage: one collection per level ("per_level") or a single
+        # collection filtered on the category_level payload ("tiered")
+        self.knowledge_storage_mode = os.getenv("KNOWLEDGE_STORAGE_MODE", "per_level")
+        self.tiered_collection_name = os.getenv(
+            "TIERED_COLLECTION_NAME", "bejo-knowledge"
+        )
+        self.retrieval_top_k = int(os.getenv("RETRIEVAL_TOP_K", "8"))
+
+        # Conversation history sent to the LLM, older turns are summarized
+        self.history_token_budget = int(os.getenv("HISTORY_TOKEN_BUDGET", "2000"))
+        # Shorter knowledge turns are not written to the user's memory
+        self.memory_min_words = int(os.getenv("MEMORY_MIN_WORDS", "3"))
+
+        # Context assembly: token budget for retrieved knowledge in the prompt,
+        # MMR relevance/diversity trade-off and near-duplicate cut-off
+        self.context_token_budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+        self.context_mmr_lambda = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))
+        self.context_duplicate_threshold = float(
+            os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.97")
+        )
+
+        # Hybrid retrieval: dense + local BM25 sparse vectors merged with RRF
+        self.hybrid_retrieval = os.getenv("HYBRID_RETRIEVAL", "false") == "true"
+        self.hybrid_prefetch_limit = int(os.getenv("HYBRID_PREFETCH_LIMIT", "20"))
+        self.sparse_average_chunk_tokens = float(
+            os.getenv("SPARSE_AVERAGE_CHUNK_TOKENS", "160")
+        )
+
+        # Qdrant collection layout, applied to new knowledge collections and
+        # to existing ones by ``python -m app.commands.apply_collection_profile``.
+        # Quantized vectors stay in RAM, searches rescore their candidates with
+        # the original vectors (``oversampling`` x the limit).
+        self.collection_profiles = {
+            # Qdrant's defaults: full float32 vectors and payloads in RAM
+            "default": {
+                "quantization": None,
+                "oversampling": 1.0,
+                "on_disk_vectors": False,
+                "on_disk_payload": False,
+                "hnsw_m": 16,
+                "hnsw_ef_construct": 100,
+            },
+            # int8 vectors in RAM (4x smaller), originals and payloads on disk
+            "balanced": {
+                "quantization": "scalar",
+                "oversampling": 2.0,
+                "on_disk_vectors": True,
+                "on_disk_payload": True,
+                "hnsw_m": 16,
+                "hnsw_ef_construct": 100,
+            },
+            # 1-bit vectors in RAM (32x smaller) and a sparser HNSW graph
+            "low_memory": {
+                "quantization": "binary",
+                "oversampling": 3.0,
+                "on_disk_vectors": True,
+                "on_disk_payload": True,
+                "hnsw_m": 8,
+                "hnsw_ef_construct": 64,
+            },
+        }
+        self.collection_profile = os.getenv("QDRANT_COLLECTION_PROFILE", "default")
+        # Keyword payload indexes for the duplicate and revision lookups
+        self.collection_payload_indexes = ["metadata.file_hash", "metadata.source"]
+
+        # Semantic answer cache configuration
+        self.answer_cache_enabled = os.getenv("ANSWER_CACHE_ENABLED", "true") == "true"
+        self.answer_cache_similarity_threshold = float(
+            os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95")
+        )
+        self.answer_cache_ttl_seconds = float(
+            os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600")
+        )
+        self.answer_cache_max_size = int(os.getenv("ANSWER_CACHE_MAX_SIZE", "1000"))
+
+        # Background memory writer configuration
+        self.memory_writer_queue_size = int(
+            os.getenv("MEMORY_WRITER_QUEUE_SIZE", "1000")
+        )
+        self.memory_writer_batch_size = int(os.getenv("MEMORY_WRITER_BATCH_SIZE", "20"))
+        self.memory_writer_flush_interval = float(
+            os.getenv("MEMORY_WRITER_FLUSH_INTERVAL", "2.0")
+        )
 
         # Memory configuration
         self.memory_config = {
@@ -28,9 +158,11 @@ class Settings:
                 "provider": "qdrant",
                 "config": {
                     "collection_name": "memory",
-                    "host": "localhost",
-                    "port": 6333,
-                    "embedding_model_dims": 768,
+                    # mem0 is given the shared client when it is built, host
+                    # and port only satisfy its config validation
+                    "host": urlparse(self.qdrant_url).hostname,
+                    "port": urlparse(self.qdrant_url).port or 6333,
+                    "embedding_model_dims": self.embedding_dims,
                 },
             },
             "llm": {
@@ -41,24 +173,95 @@ class Settings:
                     "max_tokens": 2000,
                 },
             },
-            "embedder": {
-                "provider": "gemini",
-                "config": {
-                    "model": self.embedding_model,
-                },
-            },
         }
 
-        self._init_models()
+        # Models are built on first use (or by the lifespan warm-up), so
+        # importing the app stays cheap and does not need Qdrant or Gemini
+        self.model_warm_up = os.getenv("MODEL_WARM_UP", "true") == "true"
+        self.readiness_timeout = float(os.getenv("READINESS_TIMEOUT", "2.0"))
+        self._llm = None
+        self._embedding = None
+        self._memory = None
+        self._models_lock = threading.RLock()
+
+    @property
+    def llm(self):
+        """Gemini chat model"""
+        if self._llm is None:
+            with self._models_lock:
+                if self._llm is None:
+                    from langchain_google_genai import ChatGoogleGenerativeAI
+
+                    self._llm = ChatGoogleGenerativeAI(
+                        model=self.llm_model, temperature=self.llm_temperature
+                    )
+                    logger.info(f"LLM {self.llm_model} initialized")
+        return self._llm
+
+    @llm.setter
+    def llm(self, value):
+        self._llm = value
+
+    @property
+    def embedding(self) -> CachedEmbeddings:
+        """Embedding model behind the shared two-tier cache
+
+        Every embedding call (retrieval, mem0, ingestion) goes through it.
+        """
+        if self._embedding is None:
+            with self._models_lock:
+                if self._embedding is None:
+                    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+                    self._embedding = CachedEmbeddings(
+                        GoogleGenerativeAIEmbeddings(model=self.embedding_model),
+                        model_name=self.embedding_model,
+                        db_path=os.path.join(self.data_dir, "embeddings.sqlite3"),
+                        max_memory_items=self.embedding_cache_memory_items,
+                    )
+                    logger.info(f"Embedding model {self.embedding_model} initialized")
+        return self._embedding
+
+    @embedding.setter
+    def embedding(self, value):
+        self._embedding = value
+
+    @property
+    def memory(self):
+        """mem0 memory, on the shared Qdrant client"""
+        if self._memory is None:
+            with self._models_lock:
+                if self._memory is None:
+                    from mem0 import Memory
+                    from app.services.vector_store import vector_store_registry
+
+                    self.memory_config["vector_store"]["config"]["client"] = (
+                        vector_store_registry.client
+                    )
+                    # mem0 shares our embedding model so a query vector computed
+                    # once by the graph can be reused for the memory search
+                    self.memory_config["embedder"] = {
+                        "provider": "langchain",
+                        "config": {"model": self.embedding},
+                    }
+                    self._memory = Memory.from_config(self.memory_config)
+                    logger.info("Memory initialized")
+        return self._memory
+
+    @memory.setter
+    def memory(self, value):
+        self._memory = value
+
+    @property
+    def models_ready(self) -> bool:
+        return None not in (self._llm, self._embedding, self._memory)
 
-    def _init_models(self):
-        """Initialize LLM, embeddings, and memory instances"""
+    def warm_up_models(self):
+        """Build the LLM, embeddings and memory ahead of the first request"""
         try:
-            self.llm = ChatGoogleGenerativeAI(
-                model=self.llm_model, temperature=self.llm_temperature
-            )
-            self.embedding = GoogleGenerativeAIEmbeddings(model=self.embedding_model)
-            self.memory = Memory.from_config(self.memory_config)
+            self.llm
+            self.embedding
+            self.memory
             logger.info("Models and memory initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize models: {e}")
@@ -1,11 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
 import logging
+from app.config.settings import settings
 from app.routes.chat import router as chat_router
-from app.routes.uploads import router as upload_router
-import os
+from app.routes.uploads import files_router, router as upload_router
+from app.routes.metrics import router as metrics_router
+from app.agent.graph import enable_persistence
+from app.services.conversations import conversation_store
+from app.services.ingestion_jobs import ingestion_jobs
+from app.services.memory_writer import memory_writer
+from app.services.readiness import warm_up_dependencies
+from app.services.vector_store import vector_store_registry
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,8 +23,25 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("BEJO Chatbot API is starting up...")
+    # Models and Qdrant handles warm up in the background, /ready reports
+    # when they are done; without warm-up they are built on first use
+    warm_up = (
+        asyncio.create_task(asyncio.to_thread(warm_up_dependencies))
+        if settings.model_warm_up
+        else None
+    )
+    enable_persistence(await conversation_store.open())
+    memory_writer.start()
+    ingestion_jobs.start()
     yield
     logger.info("BEJO Chatbot API is shutting down...")
+    if warm_up is not None and not warm_up.done():
+        logger.info("Waiting for model warm-up to finish...")
+        await asyncio.wait([warm_up], timeout=30)
+    await ingestion_jobs.stop()
+    await memory_writer.stop()
+    await conversation_store.close()
+    await vector_store_registry.aclose()
 
 
 # Create FastAPI app with lifespan
@@ -37,9 +61,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploads")
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
-
 # Add route
 app.include_router(chat_router, prefix="/api/v1", tags=["chat"])
 app.include_router(upload_router, prefix="/api/v1", tags=["uploads"])
+app.include_router(metrics_router, prefix="/api/v1", tags=["metrics"])
+app.include_router(files_router, tags=["uploads"])
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, Optional
 
 
 class ChatRequest(BaseModel):
@@ -9,6 +9,9 @@ class ChatRequest(BaseModel):
     category: int = Field(..., ge=1, le=4, description="User category level (1-4)")
     user_id: str = Field(..., description="Unique identifier for the user")
     thread_id: str = Field(..., description="unique identifier for the session")
+    bypass_cache: bool = Field(
+        False, description="Skip the semantic answer cache for this request"
+    )
 
 
 class ChatResponse(BaseModel):
@@ -18,6 +21,7 @@ class ChatResponse(BaseModel):
     input_tokens: int = Field(..., description="Number of input tokens used")
     output_tokens: int = Field(..., description="Number of output tokens used")
     total_tokens: int = Field(..., description="Total tokens used")
+    cached: bool = Field(False, description="Whether the answer came from the cache")
 
 
 class HealthResponse(BaseModel):
@@ -25,3 +29,17 @@ class HealthResponse(BaseModel):
 
     status: str = "healthy"
     message: str = "BEJO chatbot is running"
+
+
+class DependencyCheck(BaseModel):
+    """Result of one readiness dependency check"""
+
+    ok: bool
+    error: Optional[str] = None
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness check response"""
+
+    status: str = Field(..., description="ready or not_ready")
+    checks: Dict[str, DependencyCheck]
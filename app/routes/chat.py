@@ -1,7 +1,21 @@
 from fastapi import APIRouter, HTTPException
-from langchain_core.messages import HumanMessage
-from app.models.messages import ChatRequest, ChatResponse, HealthResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from app.models.messages import (
+    ChatRequest,
+    ChatResponse,
+    HealthResponse,
+    ReadinessResponse,
+)
+from typing import List, Optional, Tuple
 from app.agent.graph import agent_app
+from app.agent.router import is_small_talk
+from app.config.settings import settings
+from app.services.answer_cache import answer_cache
+from app.services.conversations import thread_config
+from app.services.memory_writer import memory_writer
+from app.services.readiness import check_readiness
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,29 +24,158 @@ router = APIRouter()
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (liveness), does not touch any dependency"""
     return HealthResponse()
 
 
+@router.get(
+    "/ready",
+    response_model=ReadinessResponse,
+    response_model_exclude_none=True,
+    responses={503: {"model": ReadinessResponse}},
+)
+async def readiness_check():
+    """Readiness endpoint: Qdrant, models and background workers, 503 until all pass"""
+    readiness = await check_readiness()
+    if readiness["status"] != "ready":
+        return JSONResponse(status_code=503, content=readiness)
+    return readiness
+
+
+def _build_initial_state(
+    request: ChatRequest, query_embedding: List[float]
+) -> dict:
+    """Create the input of a turn, the thread's history comes from the checkpointer"""
+    return {
+        "messages": [HumanMessage(content=request.input)],
+        "input_tokens_usage": 0,
+        "output_tokens_usage": 0,
+        "total_tokens_usage": 0,
+        "user_memory": "",
+        "retrieved_knowledge": "",
+        "context_tokens": 0,
+        "query_embedding": query_embedding,
+        "category": request.category,
+        "user_id": request.user_id,
+    }
+
+
+def _cache_enabled(request: ChatRequest) -> bool:
+    return settings.answer_cache_enabled and not request.bypass_cache
+
+
+async def _has_history(request: ChatRequest) -> bool:
+    """Whether the thread already has turns, its questions may depend on them"""
+    if agent_app.checkpointer is None:
+        return False
+    snapshot = await agent_app.aget_state(
+        thread_config(request.user_id, request.thread_id)
+    )
+    return bool(snapshot.values.get("messages"))
+
+
+async def _record_cached_turn(request: ChatRequest, response: str) -> None:
+    """Add a turn answered from the cache to the thread's history"""
+    if agent_app.checkpointer is None:
+        return
+    await agent_app.aupdate_state(
+        thread_config(request.user_id, request.thread_id),
+        {
+            "messages": [
+                HumanMessage(content=request.input),
+                AIMessage(content=response),
+            ]
+        },
+        as_node="summarize",
+    )
+
+
+async def _lookup_cached_answer(
+    request: ChatRequest,
+) -> Tuple[List[float], Optional[dict]]:
+    """Embed the query and look it up in the semantic answer cache
+
+    The query vector is returned as well so the graph does not embed the
+    same text again on a miss. Only the opening question of a thread is
+    looked up, follow-ups are answered in the context of the conversation.
+    Small talk is not looked up (nor embedded), the graph answers it cheaply.
+    """
+    if not _cache_enabled(request) or is_small_talk(request.input):
+        return [], None
+    if await _has_history(request):
+        return [], None
+
+    try:
+        query_embedding = await settings.embedding.aembed_query(request.input)
+    except Exception as e:
+        logger.error(f"Failed to embed query for answer cache: {e}")
+        return [], None
+
+    cached = answer_cache.lookup(request.category, query_embedding, request.user_id)
+    if cached:
+        # The graph is skipped, but the turn still belongs in the user's memory
+        # and in the thread
+        memory_writer.enqueue([HumanMessage(content=request.input)], request.user_id)
+        await _record_cached_turn(request, cached["response"])
+
+    return query_embedding, cached
+
+
+def _cache_answer(request: ChatRequest, result: dict) -> None:
+    """Remember a freshly generated answer for similar future questions"""
+    if not _cache_enabled(request) or not result["query_embedding"]:
+        return
+
+    # A zero token count means the LLM call failed and the fallback text was returned
+    if not result["total_tokens_usage"]:
+        return
+
+    # Follow-ups depend on the earlier turns of their thread
+    if len(result["messages"]) > 2 or result.get("summary"):
+        return
+
+    answer_cache.store(
+        category=request.category,
+        vector=result["query_embedding"],
+        answer={"response": result["messages"][-1].content},
+        user_id=request.user_id if result["user_memory"] else None,
+    )
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Semantic answer cache size and hit/miss counters"""
+    return answer_cache.stats()
+
+
+@router.get("/memory/stats")
+async def memory_stats():
+    """Background memory writer queue depth and drop counters"""
+    return memory_writer.stats()
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     """Main chat endpoint for BEJO assistant"""
 
     try:
-        # Create initial state for the agent
-        initial_state = {
-            "messages": [HumanMessage(content=request.input)],
-            "input_tokens_usage": 0,
-            "output_tokens_usage": 0,
-            "total_tokens_usage": 0,
-            "user_memory": "",
-            "retrieved_knowledge": "",
-            "category": request.category,
-            "user_id": request.user_id,
-        }
-
-        # Run the agent workflow
-        result = agent_app.invoke(initial_state)
+        query_embedding, cached = await _lookup_cached_answer(request)
+        if cached:
+            return ChatResponse(
+                response=cached["response"],
+                input_tokens=0,
+                output_tokens=0,
+                total_tokens=0,
+                cached=True,
+            )
+
+        initial_state = _build_initial_state(request, query_embedding)
+
+        # Run the agent workflow, continuing the thread's conversation
+        result = await agent_app.ainvoke(
+            initial_state, thread_config(request.user_id, request.thread_id)
+        )
+        _cache_answer(request, result)
 
         # Extract the response
         ai_response = result["messages"][-1].content
@@ -54,3 +197,95 @@ async def chat_endpoint(request: ChatRequest):
             status_code=500,
             detail="Internal server error occurred while processing your request",
         )
+
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Streaming chat endpoint, sends LLM tokens as server-sent events
+
+    Every token is sent as a ``token`` event while the graph runs. The last
+    event is ``completed`` and carries the same fields as ``ChatResponse``.
+    A cached answer is sent as a single token followed by ``completed``.
+    """
+
+    async def generate_tokens():
+        try:
+            query_embedding, cached = await _lookup_cached_answer(request)
+            if cached:
+                for event in (
+                    {"step": "token", "content": cached["response"]},
+                    {
+                        "step": "completed",
+                        "response": cached["response"],
+                        "input_tokens": 0,
+                        "output_tokens": 0,
+                        "total_tokens": 0,
+                        "cached": True,
+                    },
+                ):
+                    json_data = json.dumps(event, ensure_ascii=False)
+                    yield f"data: {json_data}\n\n"
+                return
+
+            initial_state = _build_initial_state(request, query_embedding)
+            result = initial_state
+            async for mode, chunk in agent_app.astream(
+                initial_state,
+                thread_config(request.user_id, request.thread_id),
+                stream_mode=["messages", "values"],
+            ):
+                if mode == "values":
+                    result = chunk
+                    continue
+
+                # Only forward tokens streamed by the answering LLM calls
+                message, metadata = chunk
+                if (
+                    isinstance(message, AIMessageChunk)
+                    and metadata.get("langgraph_node") in ("processing", "small_talk")
+                    and message.content
+                ):
+                    json_data = json.dumps(
+                        {"step": "token", "content": message.content},
+                        ensure_ascii=False,
+                    )
+                    yield f"data: {json_data}\n\n"
+
+            _cache_answer(request, result)
+
+            logger.info(
+                f"Streamed request for user {request.user_id}, category {request.category}"
+            )
+
+            json_data = json.dumps(
+                {
+                    "step": "completed",
+                    "response": result["messages"][-1].content,
+                    "input_tokens": result["input_tokens_usage"],
+                    "output_tokens": result["output_tokens_usage"],
+                    "total_tokens": result["total_tokens_usage"],
+                    "cached": False,
+                },
+                ensure_ascii=False,
+            )
+            yield f"data: {json_data}\n\n"
+
+        except Exception as e:
+            logger.error(f"Chat stream error: {e}")
+            error_msg = json.dumps(
+                {
+                    "step": "error",
+                    "message": "Internal server error occurred while processing your request",
+                    "error": True,
+                }
+            )
+            yield f"data: {error_msg}\n\n"
+
+    return StreamingResponse(
+        generate_tokens(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        },
+    )
@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus metrics: node, Qdrant, embedding, mem0 and LLM latency, tokens"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
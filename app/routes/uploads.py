@@ -1,38 +1,117 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from typing import Annotated
+from typing import Annotated, List, Optional
 from pydantic import Field
-import json
-import re
 import asyncio
-from fastapi.responses import StreamingResponse
+import json
+import mimetypes
+from fastapi.responses import FileResponse, StreamingResponse
 
-from app.services.add_knowledge import add_knowledge
+from app.services.add_knowledge import make_safe_filename, save_upload
+from app.services.bulk_ingestion import save_bulk_uploads
+from app.services.ingestion_jobs import ingestion_jobs
+from app.services.upload_store import upload_store
 
 router = APIRouter()
+# Serves /uploads/<level>/<filename>, the source links stored with the knowledge
+files_router = APIRouter()
 
 
 @router.post("/upload")
 async def upload_files(
     file: UploadFile = File(...),
     category_level: Annotated[int, Field(ge=1, le=4)] = Form(...),
+    replace: bool = Form(False),
 ):
-    file_content = await file.read()
+    """Stream the file to disk and queue it for ingestion
+
+    Returns the job right away, progress is available from the job status
+    and events endpoints. With ``replace`` the upload is a new revision of
+    an existing file: only its changed chunks are embedded.
+    """
+    safe_filename = make_safe_filename(file.filename)
+
+    if category_level < 1 or category_level > 4:
+        raise HTTPException(
+            status_code=403, detail="Category level must be between 1 and 4"
+        )
+
+    saved = await save_upload(file, safe_filename, category_level, replace)
+    if saved["step"] != "file_saved":
+        return saved
+
+    job = ingestion_jobs.submit(
+        saved["filename"], saved["filepath"], category_level, saved["file_hash"]
+    )
 
-    safe_filename = re.sub(r"[^a-zA-Z0-9_.-]", "_", file.filename)
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "filename": saved["filename"],
+        "message": saved["message"],
+        "url": saved["url"],
+        "status_url": f"/api/v1/upload/jobs/{job['id']}",
+        "events_url": f"/api/v1/upload/jobs/{job['id']}/events",
+    }
+
+
+@router.post("/upload/bulk")
+async def upload_bulk(
+    files: List[UploadFile] = File(...),
+    category_level: Annotated[int, Field(ge=1, le=4)] = Form(...),
+    replace: bool = Form(False),
+):
+    """Save many files (or zip archives of files) and ingest them as one job
 
+    The files go through the pipelined bulk ingestion, per-file progress
+    and aggregate throughput are available from the job events endpoint.
+    """
     if category_level < 1 or category_level > 4:
         raise HTTPException(
             status_code=403, detail="Category level must be between 1 and 4"
         )
 
+    saved, skipped = await save_bulk_uploads(files, category_level, replace)
+    if not saved:
+        return {
+            "step": "stopped",
+            "message": "No new files to ingest",
+            "progress": 100,
+            "skipped": skipped,
+            "stopped": True,
+        }
+
+    job = ingestion_jobs.submit_bulk(saved, category_level)
+
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "files": [file["filename"] for file in saved],
+        "skipped": skipped,
+        "status_url": f"/api/v1/upload/jobs/{job['id']}",
+        "events_url": f"/api/v1/upload/jobs/{job['id']}/events",
+    }
+
+
+@router.get("/upload/jobs/{job_id}")
+async def upload_job_status(job_id: str):
+    """Current status and progress of an ingestion job"""
+    job = ingestion_jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/upload/jobs/{job_id}/events")
+async def upload_job_events(job_id: str):
+    """Stream an ingestion job's progress events as server-sent events"""
+    if ingestion_jobs.get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
     async def generate_progress():
         try:
-            async for progress in add_knowledge(
-                file_content, safe_filename, category_level
-            ):
+            async for progress in ingestion_jobs.events(job_id):
                 json_data = json.dumps(progress, ensure_ascii=False)
                 yield f"data: {json_data}\n\n"
-                await asyncio.sleep(0.05)
         except Exception as e:
             error_msg = json.dumps(
                 {
@@ -51,3 +130,26 @@ async def upload_files(
             "Connection": "keep-alive",
         },
     )
+
+
+def _file_response(path: Optional[str], filename: str) -> FileResponse:
+    if path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    return FileResponse(path, media_type=media_type)
+
+
+@files_router.api_route(
+    "/uploads/{category_level}/{filename}", methods=["GET", "HEAD"]
+)
+async def serve_upload(category_level: int, filename: str):
+    """Serve an uploaded file by its level and public name through the upload store aliases"""
+    path = await asyncio.to_thread(upload_store.resolve, category_level, filename)
+    return _file_response(path, filename)
+
+
+@files_router.api_route("/uploads/{filename}", methods=["GET", "HEAD"])
+async def serve_legacy_upload(filename: str):
+    """Serve a flat link stored with knowledge ingested before links had a level"""
+    path = await asyncio.to_thread(upload_store.resolve_legacy, filename)
+    return _file_response(path, filename)
@@ -1,107 +1,219 @@
-from docling.document_converter import DocumentConverter
 from langchain_core.documents import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_qdrant import QdrantVectorStore
-
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import (
-    Distance,
-    VectorParams,
-    Filter,
-    FieldCondition,
-    MatchValue,
+
+from app.services.answer_cache import answer_cache
+from app.services.file_index import file_hash_index
+from app.services.chunk_manifest import document_id
+from app.services.indexing import sync_document_chunks
+from app.services.ingestion_components import ingestion_components
+from app.services.upload_store import (
+    FilenameTakenError,
+    compute_file_sha256,
+    upload_store,
+    upload_url,
+)
+from app.services.vector_store import (
+    target_collection_name,
+    vector_store_registry,
 )
+from typing import Optional
 from uuid import uuid4
 from dotenv import load_dotenv
+import asyncio
 import hashlib
 import logging
+import time
 import os
+import re
 
 load_dotenv()
 logger = logging.getLogger(__name__)
-BASE_URL = os.getenv("BASE_URL")
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def make_safe_filename(filename: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_.-]", "_", filename)
+
+
+def convert_document(
+    filepath: str,
+    safe_filename: str,
+    category_level: int,
+    file_hash: str,
+) -> Document:
+    """Convert a file to a markdown Document carrying the knowledge metadata
+
+    Blocks until one of the shared converters is free, run it in a thread.
+    """
+    with ingestion_components.converter() as converter:
+        result = converter.convert(filepath).document
+    return Document(
+        page_content=result.export_to_markdown(),
+        metadata={
+            "source": upload_url(safe_filename, category_level),
+            # The stored blob is named by its hash, the public name is the alias
+            "filename": safe_filename,
+            "mimetype": (
+                result.origin.mimetype if result.origin else "application/octet-stream"
+            ),
+            "category_level": category_level,
+            "file_hash": file_hash,
+        },
+    )
+
+
+async def save_upload(
+    upload, safe_filename: str, category_level: int, replace: bool = False
+) -> dict:
+    """Stream an upload into the content-addressed upload store, hashing it on the fly
+
+    ``upload`` is anything with an async ``read(size)`` (e.g. FastAPI's
+    UploadFile). The bytes go to a temp file in chunks and the hash is
+    checked against the local file hash index, a duplicate costs one
+    lookup and is never stored. Memory use stays flat for large files.
+    A different file under a name the level already uses is rejected
+    unless ``replace`` is set, then it is stored as the new revision and
+    ingestion only embeds its changed chunks.
+
+    Returns the final progress event: ``file_saved`` with the public
+    filename, blob path and hash on success, otherwise an ``error`` event.
+    """
+    # STEP 1: STREAM THE FILE TO A TEMP FILE INSIDE THE STORE
+    temp_path = os.path.join(upload_store.temp_dir, f"{uuid4()}.part")
+    file_hash = hashlib.sha256()
+    size = 0
+    try:
+        with open(temp_path, "wb") as f:
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                file_hash.update(chunk)
+                size += len(chunk)
+                await asyncio.to_thread(f.write, chunk)
+    except Exception as e:
+        _remove_quietly(temp_path)
+        return {
+            "step": "error",
+            "message": f"Error saving file: {str(e)}",
+            "progress": 25,
+            "error": True,
+        }
 
-def compute_sha256(content: bytes) -> str:
-    return hashlib.sha256(content).hexdigest()
+    # Validate file content
+    if size == 0:
+        _remove_quietly(temp_path)
+        return {
+            "step": "error",
+            "message": "Uploaded file is empty or unreadable",
+            "progress": 10,
+            "error": True,
+        }
 
+    # STEP 2: CHECK FOR DUPLICATE IN THE LOCAL HASH INDEX
+    file_hash = file_hash.hexdigest()
+    existing = file_hash_index.lookup(file_hash, category_level)
+    if existing is not None:
+        _remove_quietly(temp_path)
+        return {
+            "step": "error",
+            "message": f"File already exists in collection as '{existing}' (hash: {file_hash})",
+            "progress": 45,
+            "url": upload_url(existing, category_level),
+            "error": True,
+        }
+
+    # STEP 3: CLAIM THE HASH, THEN COMMIT THE BLOB AND ITS ALIAS
+    # The claim comes first so a concurrent upload of the same bytes loses
+    # before it touches the store, never leaving an alias without content
+    if not file_hash_index.add(file_hash, category_level, safe_filename):
+        _remove_quietly(temp_path)
+        return {
+            "step": "error",
+            "message": f"File already exists in collection (hash: {file_hash})",
+            "progress": 45,
+            "error": True,
+        }
 
-async def add_knowledge(file_content: bytes, safe_filename: str, category_level: str):
     try:
-        # STEP 1: CHECK: IF THE FILE NOT EXEIST THEN SAVE FILE (CONTUNIUE PROCESS) ELSE STOP PROCESS
-        UPLOAD_DIR = os.path.abspath(
-            os.path.join(os.path.dirname(__file__), "..", "uploads")
+        filepath = await asyncio.to_thread(
+            upload_store.put,
+            temp_path,
+            file_hash,
+            safe_filename,
+            category_level,
+            replace,
         )
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-        filepath = os.path.join(UPLOAD_DIR, safe_filename)
-        url = f"{BASE_URL}/uploads/{safe_filename}"
-
-        # STEP 1: CHECK IF FILE EXISTS
-        if os.path.exists(filepath):
-            yield {
-                "step": "file_exists",
-                "message": f"File '{safe_filename}' already exists. Process stopped.",
-                "progress": 100,
-                "filepath": filepath,
-                "url": url,
-                "stopped": True,
-            }
-            return
-
-        # FILE DOES NOT EXIST - CONTINUE WITH SAVE PROCESS
-        yield {"step": "saving_file", "message": "Saving file...", "progress": 10}
-
-        # Validate file content
-        if not file_content or len(file_content) == 0:
-            yield {
-                "step": "error",
-                "message": "Uploaded file is empty or unreadable",
-                "progress": 10,
-                "error": True,
-            }
-            return
+    except FilenameTakenError as e:
+        file_hash_index.remove(file_hash, category_level)
+        _remove_quietly(temp_path)
+        return {
+            "step": "error",
+            "message": f"{str(e)}, upload it with replace to store a new revision",
+            "progress": 45,
+            "url": upload_url(safe_filename, category_level),
+            "error": True,
+        }
+    except Exception as e:
+        file_hash_index.remove(file_hash, category_level)
+        _remove_quietly(temp_path)
+        return {
+            "step": "error",
+            "message": f"Error saving file: {str(e)}",
+            "progress": 25,
+            "error": True,
+        }
 
-        # Save file
-        try:
-            with open(filepath, "wb") as f:
-                f.write(file_content)
+    if replace:
+        file_hash_index.release_previous_revisions(
+            safe_filename, category_level, file_hash
+        )
 
-            yield {
-                "step": "file_saved",
-                "message": "File saved successfully",
-                "progress": 50,
-            }
+    return {
+        "step": "file_saved",
+        "message": "File saved successfully",
+        "progress": 20,
+        "filename": safe_filename,
+        "filepath": filepath,
+        "url": upload_url(safe_filename, category_level),
+        "file_hash": file_hash,
+    }
 
-        except Exception as e:
-            yield {
-                "step": "error",
-                "message": f"Error saving file: {str(e)}",
-                "progress": 25,
-                "error": True,
-            }
-            return
 
-        # Verify file was saved properly
-        if not os.path.exists(filepath) or os.path.getsize(filepath) == 0:
-            yield {
-                "step": "error",
-                "message": "File was not saved properly",
-                "progress": 15,
-                "error": True,
-            }
-            return
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+async def add_knowledge(
+    filepath: str,
+    safe_filename: str,
+    category_level: int,
+    file_hash: Optional[str] = None,
+    resume: bool = False,
+):
+    """Convert, chunk and index an uploaded file that was saved by ``save_upload``
+
+    Duplicates were already rejected by ``save_upload`` against the local
+    file hash index, so no Qdrant lookup is needed here.
+
+    Chunk IDs are derived from the document identity and the chunk text,
+    so re-ingesting a new revision only embeds the chunks that changed.
+    With ``resume`` the batches an interrupted run already committed are
+    skipped instead of being embedded again.
+    """
+    try:
+        url = upload_url(safe_filename, category_level)
+        # Seconds spent in each stage, reported with the result for the metrics
+        stage_seconds = {}
 
         # STEP 2: INITIALIZE COMPONENTS
         yield {"step": "initializing", "message": "Initializing...", "progress": 30}
 
         try:
-            embedding = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
-            converter = DocumentConverter()
-            splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000, chunk_overlap=200
-            )
-            qdrant_client = QdrantClient(url="http://localhost:6333")
+            # Only slow for the first job of a process that was not warmed up
+            started = time.perf_counter()
+            await asyncio.to_thread(ingestion_components.warm_up)
+            stage_seconds["initialize"] = time.perf_counter() - started
         except Exception as init_error:
             yield {
                 "step": "error",
@@ -113,56 +225,23 @@ async def add_knowledge(file_content: bytes, safe_filename: str, category_level:
 
         yield {"step": "component_ready", "message": "Component ready", "progress": 40}
 
-        # STEP 3: CALCULATE HASH
-        file_hash = compute_sha256(file_content)
+        # STEP 3: CALCULATE HASH (only when the caller does not know it yet)
+        if file_hash is None:
+            started = time.perf_counter()
+            file_hash = await asyncio.to_thread(compute_file_sha256, filepath)
+            stage_seconds["hash"] = time.perf_counter() - started
 
-        # STEP 4: CHECK FOR DUPLICATE
-        collection_name = f"bejo-knowledge-level-{category_level}"
-        try:
-            existing = qdrant_client.scroll(
-                collection_name=collection_name,
-                scroll_filter=Filter(
-                    must=[
-                        FieldCondition(
-                            key="file_hash", match=MatchValue(value=file_hash)
-                        )
-                    ]
-                ),
-                limit=1,
-            )
-
-            if existing and len(existing[0]) > 0:
-                yield {
-                    "step": "error",
-                    "message": f"File already exists in collection (hash: {file_hash})",
-                    "progress": 45,
-                    "error": True,
-                }
-                return
-        except Exception as check_error:
-            pass
+        collection_name = target_collection_name(category_level)
 
         # STEP 5: CONVERT DOCUMENT
         yield {"step": "converting", "message": "Converting...", "progress": 50}
 
         try:
-            result = converter.convert(filepath).document
-            document = Document(
-                page_content=result.export_to_markdown(),
-                metadata={
-                    "source": url,
-                    "filename": (
-                        result.origin.filename if result.origin else safe_filename
-                    ),
-                    "mimetype": (
-                        result.origin.mimetype
-                        if result.origin
-                        else "application/octet-stream"
-                    ),
-                    "category_level": category_level,
-                    "file_hash": file_hash,
-                },
+            started = time.perf_counter()
+            document = await asyncio.to_thread(
+                convert_document, filepath, safe_filename, category_level, file_hash
             )
+            stage_seconds["convert"] = time.perf_counter() - started
         except Exception as convert_error:
             yield {
                 "step": "error",
@@ -172,13 +251,15 @@ async def add_knowledge(file_content: bytes, safe_filename: str, category_level:
             }
             return
 
-        yield {"step": "converted", "message": f"Document converted", "progress": 60}
+        yield {"step": "converted", "message": "Document converted", "progress": 60}
 
         # STEP 6: SPLIT DOCUMENT
         yield {"step": "splitting", "message": "Chunking document...", "progress": 70}
 
         try:
-            docs_splitted = splitter.split_documents([document])
+            started = time.perf_counter()
+            docs_splitted = ingestion_components.split([document])
+            stage_seconds["split"] = time.perf_counter() - started
         except Exception as split_error:
             yield {
                 "step": "error",
@@ -202,28 +283,14 @@ async def add_knowledge(file_content: bytes, safe_filename: str, category_level:
         }
 
         try:
-            try:
-                qdrant = QdrantVectorStore(
-                    client=qdrant_client,
-                    embedding=embedding,
-                    collection_name=collection_name,
-                )
-            except Exception:
+            if vector_store_registry.get_store(collection_name) is None:
                 yield {
                     "step": "collection_not_found",
                     "message": f"Collection {collection_name} not found. Creating...",
                     "progress": 87,
                 }
 
-                qdrant_client.create_collection(
-                    collection_name=collection_name,
-                    vectors_config=VectorParams(size=768, distance=Distance.COSINE),
-                )
-                qdrant = QdrantVectorStore(
-                    client=qdrant_client,
-                    embedding=embedding,
-                    collection_name=collection_name,
-                )
+                vector_store_registry.create_collection(collection_name)
 
                 yield {
                     "step": "collection_created",
@@ -241,12 +308,26 @@ async def add_knowledge(file_content: bytes, safe_filename: str, category_level:
             return
 
         try:
-            uuids = [str(uuid4()) for _ in docs_splitted]
-            qdrant.add_documents(docs_splitted, ids=uuids)
+            started = time.perf_counter()
+            async for progress in sync_document_chunks(
+                docs_splitted,
+                document_id(safe_filename, category_level),
+                safe_filename,
+                category_level,
+                file_hash,
+                collection_name,
+                resume=resume,
+            ):
+                yield progress
+
+            stage_seconds["index"] = time.perf_counter() - started
+
+            # Cached answers may no longer reflect the knowledge of this level
+            answer_cache.invalidate_level(category_level)
 
             yield {
                 "step": "documents_added",
-                "message": f"Added {len(docs_splitted)} chunks to {collection_name}",
+                "message": f"Stored {len(docs_splitted)} chunks in {collection_name}",
                 "progress": 95,
             }
         except Exception as add_error:
@@ -271,6 +352,9 @@ async def add_knowledge(file_content: bytes, safe_filename: str, category_level:
                 "chunks_count": len(docs_splitted),
                 "collection_name": collection_name,
                 "file_hash": file_hash,
+                "stage_seconds": {
+                    stage: round(seconds, 3) for stage, seconds in stage_seconds.items()
+                },
             },
         }
 
@@ -0,0 +1,129 @@
+from collections import OrderedDict
+from typing import List, Optional
+from app.config.settings import settings
+import numpy as np
+import threading
+import itertools
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """LRU cache of chat answers keyed by category and query embedding
+
+    A lookup is a hit when a cached query of the same category has a cosine
+    similarity of at least ``similarity_threshold`` with the new query and
+    is younger than ``ttl_seconds``. Answers that were generated with a
+    user's personal memory are only served back to that same user.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = settings.answer_cache_similarity_threshold,
+        ttl_seconds: float = settings.answer_cache_ttl_seconds,
+        max_size: int = settings.answer_cache_max_size,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+
+        self._entries: OrderedDict = OrderedDict()
+        self._keys = itertools.count()
+        self._lock = threading.Lock()
+
+        # Counters exposed through stats()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def lookup(
+        self, category: int, vector: List[float], user_id: str
+    ) -> Optional[dict]:
+        """Return the cached answer closest to the query, or None on a miss"""
+        query = self._normalize(vector)
+        now = time.monotonic()
+
+        with self._lock:
+            best_key, best_score = None, self.similarity_threshold
+            for key, entry in list(self._entries.items()):
+                if now - entry["created_at"] > self.ttl_seconds:
+                    del self._entries[key]
+                    continue
+                if entry["category"] != category:
+                    continue
+                if entry["user_id"] is not None and entry["user_id"] != user_id:
+                    continue
+
+                score = float(np.dot(query, entry["vector"]))
+                if score >= best_score:
+                    best_key, best_score = key, score
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            logger.info(f"Answer cache hit (similarity {best_score:.3f})")
+            return self._entries[best_key]["answer"]
+
+    def store(
+        self,
+        category: int,
+        vector: List[float],
+        answer: dict,
+        user_id: Optional[str] = None,
+    ) -> None:
+        """Cache an answer, scoped to ``user_id`` when it used personal memory"""
+        with self._lock:
+            self._entries[next(self._keys)] = {
+                "category": category,
+                "vector": self._normalize(vector),
+                "answer": answer,
+                "user_id": user_id,
+                "created_at": time.monotonic(),
+            }
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_level(self, level: int) -> int:
+        """Drop every answer that could have used knowledge of ``level``"""
+        with self._lock:
+            stale = [
+                key
+                for key, entry in self._entries.items()
+                if entry["category"] >= level
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidated += len(stale)
+
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached answers for level {level}")
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Cache size and hit/miss counters"""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+        }
+
+
+# Global answer cache instance
+answer_cache = SemanticAnswerCache()
@@ -0,0 +1,423 @@
+from typing import AsyncIterator, List, Optional, Set, Tuple
+from app.config.settings import settings
+from app.services.add_knowledge import (
+    convert_document,
+    make_safe_filename,
+    save_upload,
+)
+from app.services.answer_cache import answer_cache
+from app.services.file_index import file_hash_index
+from app.services.chunk_manifest import document_id
+from app.services.indexing import sync_document_chunks
+from app.services.ingestion_components import ingestion_components
+from app.services.vector_store import target_collection_name, vector_store_registry
+import zipfile
+import asyncio
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+class _ZipMemberReader:
+    """Async ``read(size)`` over an open zip member, as ``save_upload`` expects"""
+
+    def __init__(self, member):
+        self._member = member
+
+    async def read(self, size: int = -1) -> bytes:
+        return await asyncio.to_thread(self._member.read, size)
+
+
+def _zip_member_limit(info, members: int, total_bytes: int) -> Optional[dict]:
+    """The skip event of a zip member that would exceed a limit, else None"""
+    if members >= settings.bulk_zip_max_members:
+        message = f"Archive has more than {settings.bulk_zip_max_members} files"
+    elif info.file_size > settings.bulk_zip_max_member_bytes:
+        message = (
+            f"File is {info.file_size} bytes uncompressed, the limit is "
+            f"{settings.bulk_zip_max_member_bytes}"
+        )
+    elif total_bytes + info.file_size > settings.bulk_zip_max_total_bytes:
+        message = (
+            f"Archive exceeds {settings.bulk_zip_max_total_bytes} bytes uncompressed"
+        )
+    else:
+        return None
+    return {"step": "too_large", "message": message, "progress": 10}
+
+
+def _duplicate_name(safe_filename: str, seen: Set[str]) -> Optional[dict]:
+    """The skip event of a name an earlier file of the request already uses
+
+    Zip members are reduced to their base name, so ``a/report.pdf`` and
+    ``b/report.pdf`` meet here. Saving both would repoint the alias of the
+    first one and mix up their progress, so only the first is kept.
+    """
+    if safe_filename in seen:
+        return {
+            "step": "duplicate_name",
+            "message": f"Another file in this upload is named '{safe_filename}'",
+            "progress": 10,
+        }
+    seen.add(safe_filename)
+    return None
+
+
+async def _save_zip_members(
+    upload, category_level: int, replace: bool, seen: Set[str]
+) -> List[Tuple[str, dict]]:
+    try:
+        archive = await asyncio.to_thread(zipfile.ZipFile, upload.file)
+    except zipfile.BadZipFile as e:
+        return [
+            (
+                upload.filename,
+                {
+                    "step": "error",
+                    "message": f"Invalid zip archive: {str(e)}",
+                    "progress": 10,
+                    "error": True,
+                },
+            )
+        ]
+
+    results = []
+    members = 0
+    total_bytes = 0
+    with archive:
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+            # Skip folders, macOS resource forks and hidden files
+            if info.is_dir() or info.filename.startswith("__MACOSX/"):
+                continue
+            if not name or name.startswith("."):
+                continue
+
+            # zipfile never reads past the declared size, so checking it
+            # bounds what is written to disk (zip bombs included)
+            safe_filename = make_safe_filename(name)
+            skip = _zip_member_limit(info, members, total_bytes)
+            if skip is None:
+                skip = _duplicate_name(safe_filename, seen)
+            if skip is not None:
+                results.append((safe_filename, skip))
+                continue
+
+            members += 1
+            total_bytes += info.file_size
+            with archive.open(info) as member:
+                saved = await save_upload(
+                    _ZipMemberReader(member), safe_filename, category_level, replace
+                )
+            results.append((safe_filename, saved))
+    return results
+
+
+async def save_bulk_uploads(
+    uploads: list, category_level: int, replace: bool = False
+) -> Tuple[List[dict], List[dict]]:
+    """Save uploaded files, unpacking ``.zip`` archives into their members
+
+    Returns the saved files (filename, filepath, file_hash) and the skipped
+    ones with the reason they were not saved (already uploaded, empty, a
+    name an earlier file of the request already uses, ...).
+    """
+    saved, skipped = [], []
+    seen: Set[str] = set()
+    for upload in uploads:
+        if upload.filename.lower().endswith(".zip"):
+            results = await _save_zip_members(upload, category_level, replace, seen)
+        else:
+            safe_filename = make_safe_filename(upload.filename)
+            event = _duplicate_name(safe_filename, seen) or await save_upload(
+                upload, safe_filename, category_level, replace
+            )
+            results = [(safe_filename, event)]
+
+        for filename, event in results:
+            if event["step"] == "file_saved":
+                saved.append(
+                    {
+                        "filename": event["filename"],
+                        "filepath": event["filepath"],
+                        "file_hash": event["file_hash"],
+                    }
+                )
+            else:
+                skipped.append(
+                    {
+                        "filename": filename,
+                        "step": event["step"],
+                        "message": event["message"],
+                    }
+                )
+    return saved, skipped
+
+
+class BulkIngestionPipeline:
+    """Ingest many files with conversion, chunking and indexing overlapped
+
+    Files flow through three stages connected by bounded queues, so while
+    the indexing stage embeds file N the converter is already working on
+    file N+1. A slow stage makes the earlier ones wait once the queue in
+    front of it (``settings.bulk_ingestion_queue_size``) is full. A file
+    that fails is reported and does not stop the others.
+    """
+
+    def __init__(self, files: List[dict], category_level: int, resume: bool = False):
+        self.files = files
+        self.category_level = category_level
+        self.resume = resume
+        self.collection_name = target_collection_name(category_level)
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._results: List[dict] = []
+        self._chunks_indexed = 0
+        self._started = 0.0
+        # Seconds per stage of every file, reported with the result for the metrics
+        self._stage_seconds = {file["filename"]: {} for file in files}
+
+    def _progress(self) -> int:
+        return int(99 * len(self._results) / max(len(self.files), 1))
+
+    def _emit(self, file: dict, step: str, message: str, **extra) -> None:
+        self._events.put_nowait(
+            {
+                "step": step,
+                "message": f"{file['filename']}: {message}",
+                "progress": self._progress(),
+                "filename": file["filename"],
+                **extra,
+            }
+        )
+
+    def _throughput(self) -> dict:
+        elapsed = max(time.monotonic() - self._started, 1e-6)
+        return {
+            "files_done": len(self._results),
+            "files_failed": sum(1 for r in self._results if r["status"] == "failed"),
+            "files_total": len(self.files),
+            "chunks_indexed": self._chunks_indexed,
+            "elapsed_seconds": round(elapsed, 2),
+            "files_per_second": round(len(self._results) / elapsed, 3),
+            "chunks_per_second": round(self._chunks_indexed / elapsed, 2),
+        }
+
+    def _finish(self, file: dict, status: str, **extra) -> None:
+        self._results.append({"filename": file["filename"], "status": status, **extra})
+        stats = self._throughput()
+        self._events.put_nowait(
+            {
+                "step": "throughput",
+                "message": (
+                    f"{stats['files_done']}/{stats['files_total']} files, "
+                    f"{stats['files_per_second']} files/s, "
+                    f"{stats['chunks_per_second']} chunks/s"
+                ),
+                "progress": self._progress(),
+                **stats,
+            }
+        )
+
+    def _record_stage(self, file: dict, stage: str, started: float) -> None:
+        self._stage_seconds[file["filename"]][stage] = round(
+            time.perf_counter() - started, 3
+        )
+
+    def _fail(self, file: dict, message: str) -> None:
+        logger.warning(f"Bulk ingestion of {file['filename']} failed: {message}")
+        # Let the file be uploaded again
+        file_hash_index.remove(file["file_hash"], self.category_level)
+        self._emit(file, "file_failed", message, failed=True)
+        self._finish(file, "failed", message=message)
+
+    async def _convert_stage(
+        self, pending: asyncio.Queue, converted: asyncio.Queue
+    ) -> None:
+        while True:
+            try:
+                file = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            self._emit(file, "converting", "Converting...")
+            started = time.perf_counter()
+            try:
+                document = await asyncio.to_thread(
+                    convert_document,
+                    file["filepath"],
+                    file["filename"],
+                    self.category_level,
+                    file["file_hash"],
+                )
+            except Exception as e:
+                self._fail(file, f"Failed to convert document: {str(e)}")
+                continue
+
+            self._record_stage(file, "convert", started)
+            self._emit(file, "converted", "Document converted")
+            await converted.put((file, document))
+
+    async def _split_stage(
+        self, converted: asyncio.Queue, chunked: asyncio.Queue
+    ) -> None:
+        while (item := await converted.get()) is not _DONE:
+            file, document = item
+            started = time.perf_counter()
+            try:
+                chunks = await asyncio.to_thread(ingestion_components.split, [document])
+            except Exception as e:
+                self._fail(file, f"Failed to split document: {str(e)}")
+                continue
+
+            self._record_stage(file, "split", started)
+            self._emit(file, "chunked", f"Document chunked - Total: {len(chunks)}")
+            await chunked.put((file, chunks))
+        await chunked.put(_DONE)
+
+    async def _index_stage(self, chunked: asyncio.Queue) -> None:
+        while (item := await chunked.get()) is not _DONE:
+            file, chunks = item
+            indexed = 0
+            started = time.perf_counter()
+            try:
+                async for progress in sync_document_chunks(
+                    chunks,
+                    document_id(file["filename"], self.category_level),
+                    file["filename"],
+                    self.category_level,
+                    file["file_hash"],
+                    self.collection_name,
+                    resume=self.resume,
+                ):
+                    if progress["step"] != "batch_indexed":
+                        self._emit(file, progress["step"], progress["message"])
+                        continue
+                    self._chunks_indexed += progress["chunks_indexed"] - indexed
+                    indexed = progress["chunks_indexed"]
+                    self._emit(
+                        file,
+                        progress["step"],
+                        progress["message"],
+                        chunks_indexed=progress["chunks_indexed"],
+                        chunks_total=progress["chunks_total"],
+                    )
+            except Exception as e:
+                self._fail(file, f"Failed to add documents: {str(e)}")
+                continue
+
+            self._record_stage(file, "index", started)
+            self._emit(file, "file_completed", f"Indexed {len(chunks)} chunks")
+            self._finish(
+                file,
+                "completed",
+                chunks_count=len(chunks),
+                stage_seconds=self._stage_seconds[file["filename"]],
+            )
+
+    async def _run_stages(self) -> None:
+        try:
+            pending: asyncio.Queue = asyncio.Queue()
+            for file in self.files:
+                pending.put_nowait(file)
+            converted = asyncio.Queue(maxsize=settings.bulk_ingestion_queue_size)
+            chunked = asyncio.Queue(maxsize=settings.bulk_ingestion_queue_size)
+
+            async def convert_all() -> None:
+                # One conversion per shared converter at a time
+                await asyncio.gather(
+                    *[
+                        self._convert_stage(pending, converted)
+                        for _ in range(max(1, settings.ingestion_converters))
+                    ]
+                )
+                await converted.put(_DONE)
+
+            await asyncio.gather(
+                convert_all(),
+                self._split_stage(converted, chunked),
+                self._index_stage(chunked),
+            )
+        finally:
+            self._events.put_nowait(_DONE)
+
+    async def run(self) -> AsyncIterator[dict]:
+        """Run the pipeline, yielding per-file and aggregate progress events"""
+        self._started = time.monotonic()
+        yield {
+            "step": "initializing",
+            "message": f"Ingesting {len(self.files)} files...",
+            "progress": 0,
+        }
+
+        try:
+            await asyncio.to_thread(ingestion_components.warm_up)
+            if (
+                await asyncio.to_thread(
+                    vector_store_registry.get_store, self.collection_name
+                )
+                is None
+            ):
+                await asyncio.to_thread(
+                    vector_store_registry.create_collection, self.collection_name
+                )
+        except Exception as collection_error:
+            yield {
+                "step": "error",
+                "message": f"Failed to setup collection: {str(collection_error)}",
+                "progress": 0,
+                "error": True,
+            }
+            return
+
+        runner = asyncio.create_task(self._run_stages())
+        try:
+            while (event := await self._events.get()) is not _DONE:
+                yield event
+            await runner
+        except Exception as e:
+            logger.error(f"Bulk ingestion failed: {str(e)}")
+            yield {
+                "step": "error",
+                "message": f"Unexpected error: {str(e)}",
+                "progress": self._progress(),
+                "error": True,
+            }
+            return
+        finally:
+            runner.cancel()
+
+        stats = self._throughput()
+        completed = stats["files_done"] - stats["files_failed"]
+        if completed:
+            # Cached answers may no longer reflect the knowledge of this level
+            answer_cache.invalidate_level(self.category_level)
+
+        if not completed:
+            yield {
+                "step": "error",
+                "message": f"All {len(self.files)} files failed",
+                "progress": 100,
+                "error": True,
+                "data": {"files": self._results, **stats},
+            }
+            return
+
+        yield {
+            "step": "completed",
+            "message": (
+                f"Ingested {completed}/{len(self.files)} files, "
+                f"{self._chunks_indexed} chunks"
+            ),
+            "progress": 100,
+            "data": {
+                "category_level": self.category_level,
+                "collection_name": self.collection_name,
+                "files": self._results,
+                **stats,
+            },
+        }
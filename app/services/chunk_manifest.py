@@ -0,0 +1,121 @@
+from typing import List, Optional, Set
+from uuid import NAMESPACE_URL, uuid5
+from langchain_core.documents import Document
+from app.config.settings import settings
+import threading
+import hashlib
+import sqlite3
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def document_id(safe_filename: str, category_level: int) -> str:
+    """Stable identity of an uploaded document across its revisions"""
+    return str(uuid5(NAMESPACE_URL, f"{category_level}/{safe_filename}"))
+
+
+def chunk_point_ids(doc_id: str, chunks: List[Document]) -> List[str]:
+    """Content-addressed Qdrant point IDs for the chunks of a document
+
+    The ID depends only on the document identity and the chunk text (plus
+    its occurrence number when the same text repeats), so a chunk that is
+    unchanged between revisions keeps its point.
+    """
+    seen = {}
+    ids = []
+    for chunk in chunks:
+        chunk_hash = hashlib.sha256(chunk.page_content.encode("utf-8")).hexdigest()
+        occurrence = seen.get(chunk_hash, 0)
+        seen[chunk_hash] = occurrence + 1
+        ids.append(str(uuid5(NAMESPACE_URL, f"{doc_id}:{chunk_hash}:{occurrence}")))
+    return ids
+
+
+class ChunkManifest:
+    """Local manifest of the chunk points stored for every document
+
+    Re-ingesting a document diffs its new chunk IDs against this manifest,
+    so only new chunks are embedded and vanished ones are deleted, without
+    scanning Qdrant.
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    document_id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    category_level INTEGER NOT NULL,
+                    file_hash TEXT,
+                    chunks_count INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS document_chunks (
+                    document_id TEXT NOT NULL,
+                    point_id TEXT NOT NULL,
+                    PRIMARY KEY (document_id, point_id)
+                );
+                """
+            )
+            self._conn.commit()
+
+    def point_ids(self, doc_id: str) -> Optional[Set[str]]:
+        """Point IDs stored for a document, None if the document is unknown"""
+        with self._lock:
+            known = self._conn.execute(
+                "SELECT 1 FROM documents WHERE document_id = ?", (doc_id,)
+            ).fetchone()
+            if known is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT point_id FROM document_chunks WHERE document_id = ?",
+                (doc_id,),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def replace(
+        self,
+        doc_id: str,
+        filename: str,
+        category_level: int,
+        file_hash: Optional[str],
+        point_ids: List[str],
+    ) -> None:
+        """Record the chunk points of a document's current revision"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (document_id, filename, "
+                "category_level, file_hash, chunks_count, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (doc_id, filename, category_level, file_hash, len(point_ids), time.time()),
+            )
+            self._conn.execute(
+                "DELETE FROM document_chunks WHERE document_id = ?", (doc_id,)
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO document_chunks (document_id, point_id) "
+                "VALUES (?, ?)",
+                [(doc_id, point_id) for point_id in point_ids],
+            )
+            self._conn.commit()
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM documents WHERE document_id = ?", (doc_id,))
+            self._conn.execute(
+                "DELETE FROM document_chunks WHERE document_id = ?", (doc_id,)
+            )
+            self._conn.commit()
+
+
+# Global chunk manifest instance
+chunk_manifest = ChunkManifest(os.path.join(settings.data_dir, "chunk_manifest.sqlite3"))
@@ -0,0 +1,129 @@
+from typing import List, NamedTuple, Optional, Tuple
+from langchain_core.documents import Document
+from app.config.settings import settings
+import numpy as np
+import hashlib
+import math
+
+# Rough Gemini tokenizer ratio, good enough for budgeting the prompt
+CHARS_PER_TOKEN = 4
+
+NO_KNOWLEDGE_MESSAGE = (
+    "I'm sorry, I don't have any relevant information for your question."
+)
+
+
+class RetrievedChunk(NamedTuple):
+    """A retrieved chunk with its retrieval score and dense vector"""
+
+    document: Document
+    score: float
+    vector: Optional[List[float]] = None
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def format_chunk(document: Document) -> str:
+    return f"{document.page_content}\n(Source: {document.metadata.get('source', 'unknown')})"
+
+
+def _chunk_key(document: Document) -> str:
+    """Identity of a chunk: its point, or its text when the point is unknown"""
+    point_id = document.metadata.get("_id")
+    if point_id is not None:
+        return str(point_id)
+    return hashlib.sha256(document.page_content.encode("utf-8")).hexdigest()
+
+
+def _normalize(vector: List[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
+
+
+def select_chunks(
+    chunks: List[RetrievedChunk],
+    mmr_lambda: float,
+    duplicate_threshold: float,
+) -> List[RetrievedChunk]:
+    """Order chunks by maximal marginal relevance, dropping duplicates
+
+    Exact duplicates (same point) keep their best score,
+    chunks whose vectors are more similar than ``duplicate_threshold`` to an
+    already selected chunk are dropped, and the rest are picked greedily by
+    ``mmr_lambda * relevance - (1 - mmr_lambda) * redundancy``.
+    """
+    unique = {}
+    for chunk in sorted(chunks, key=lambda c: c.score, reverse=True):
+        key = _chunk_key(chunk.document)
+        if key not in unique:
+            unique[key] = chunk
+
+    candidates = list(unique.values())
+    if not candidates:
+        return []
+
+    # Scores from different searches (cosine, rank fusion) are put on one scale
+    scores = np.array([c.score for c in candidates], dtype=np.float32)
+    spread = float(scores.max() - scores.min())
+    relevance = (scores - scores.min()) / spread if spread else np.ones_like(scores)
+    vectors = [
+        _normalize(c.vector) if c.vector is not None else None for c in candidates
+    ]
+
+    selected: List[int] = []
+    remaining = list(range(len(candidates)))
+    while remaining:
+        best, best_value = None, -math.inf
+        for index in list(remaining):
+            redundancy = 0.0
+            if vectors[index] is not None:
+                for chosen in selected:
+                    if vectors[chosen] is not None:
+                        redundancy = max(
+                            redundancy, float(vectors[index] @ vectors[chosen])
+                        )
+            if redundancy >= duplicate_threshold:
+                remaining.remove(index)
+                continue
+
+            value = mmr_lambda * relevance[index] - (1 - mmr_lambda) * redundancy
+            if value > best_value:
+                best, best_value = index, value
+
+        if best is None:
+            break
+        selected.append(best)
+        remaining.remove(best)
+
+    return [candidates[index] for index in selected]
+
+
+def build_context(chunks: List[RetrievedChunk]) -> Tuple[str, int]:
+    """Pack the most relevant distinct chunks into the context token budget
+
+    Returns the context text and its estimated token count. Chunks are kept
+    whole; one that does not fit in what is left of the budget is skipped
+    in favour of the next, smaller one.
+    """
+    selected = select_chunks(
+        chunks,
+        mmr_lambda=settings.context_mmr_lambda,
+        duplicate_threshold=settings.context_duplicate_threshold,
+    )
+
+    separator_tokens = estimate_tokens("\n\n")
+    parts, used = [], 0
+    for chunk in selected:
+        text = format_chunk(chunk.document)
+        tokens = estimate_tokens(text) + (separator_tokens if parts else 0)
+        if used + tokens > settings.context_token_budget:
+            continue
+        parts.append(text)
+        used += tokens
+
+    if not parts:
+        return NO_KNOWLEDGE_MESSAGE, estimate_tokens(NO_KNOWLEDGE_MESSAGE)
+    return "\n\n".join(parts), used
@@ -0,0 +1,41 @@
+from typing import Optional
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from app.config.settings import settings
+import aiosqlite
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationStore:
+    """Local SQLite checkpointer that keeps the agent state of every chat thread"""
+
+    def __init__(self):
+        self._conn: Optional[aiosqlite.Connection] = None
+        self.checkpointer: Optional[AsyncSqliteSaver] = None
+
+    async def open(self) -> AsyncSqliteSaver:
+        """Open the database and create its tables, must run inside the event loop"""
+        if self.checkpointer is None:
+            os.makedirs(os.path.dirname(settings.conversations_db), exist_ok=True)
+            self._conn = await aiosqlite.connect(settings.conversations_db)
+            self.checkpointer = AsyncSqliteSaver(self._conn)
+            await self.checkpointer.setup()
+            logger.info(f"Conversation store opened at {settings.conversations_db}")
+        return self.checkpointer
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+            self.checkpointer = None
+
+
+def thread_config(user_id: str, thread_id: str) -> dict:
+    """Graph config of a chat thread, scoped to its user"""
+    return {"configurable": {"thread_id": f"{user_id}:{thread_id}"}}
+
+
+# Global conversation store instance
+conversation_store = ConversationStore()
@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from app.services.metrics import EMBEDDING_LATENCY
+import numpy as np
+import threading
+import hashlib
+import sqlite3
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper with an in-process LRU tier and an on-disk sqlite tier
+
+    Vectors are keyed by (model name, sha256 of the text) and stored as
+    float32 blobs, so they survive restarts and are shared by every process
+    that points at the same database. Query and document embeddings are
+    cached separately because the model uses a different task type for each.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        db_path: str,
+        max_memory_items: int = 5000,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.db_path = db_path
+        self.max_memory_items = max_memory_items
+
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters for the cache tiers
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.commit()
+
+    def _key(self, kind: str, text: str) -> Tuple[str, str]:
+        return (
+            f"{self.model_name}:{kind}",
+            hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        )
+
+    def _get_many(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], np.ndarray]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+            self.memory_hits += len(found)
+
+            for key in {key for key in keys if key not in found}:
+                row = self._conn.execute(
+                    "SELECT vector FROM embeddings WHERE model = ? AND text_hash = ?",
+                    key,
+                ).fetchone()
+                if row is not None:
+                    found[key] = np.frombuffer(row[0], dtype=np.float32)
+                    self._remember(key, found[key])
+                    self.disk_hits += 1
+        return found
+
+    def _put_many(self, items: Dict[Tuple[str, str], List[float]]) -> None:
+        with self._lock:
+            rows = []
+            for key, vector in items.items():
+                array = np.asarray(vector, dtype=np.float32)
+                self._remember(key, array)
+                rows.append((*key, array.tobytes()))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def _remember(self, key: Tuple[str, str], vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key("document", text) for text in texts]
+        found = self._get_many(keys)
+
+        # Embed each missing text once, even if it appears several times
+        missing: Dict[Tuple[str, str], str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing[key] = text
+
+        if missing:
+            self.misses += len(missing)
+            with EMBEDDING_LATENCY.labels(operation="documents").time():
+                vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_items = dict(zip(missing.keys(), vectors))
+            self._put_many(new_items)
+            found.update(
+                {key: np.asarray(v, dtype=np.float32) for key, v in new_items.items()}
+            )
+
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        vector: Optional[np.ndarray] = self._get_many([key]).get(key)
+        if vector is not None:
+            return vector.tolist()
+
+        self.misses += 1
+        with EMBEDDING_LATENCY.labels(operation="query").time():
+            result = self.embeddings.embed_query(text)
+        self._put_many({key: result})
+        return list(result)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for both cache tiers"""
+        return {
+            "memory_items": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,77 @@
+from typing import Optional
+from app.config.settings import settings
+import threading
+import sqlite3
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class FileHashIndex:
+    """Local index of ingested file hashes per category level
+
+    Uploads are checked against this index before any conversion starts,
+    so duplicates are rejected without asking Qdrant.
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS file_hashes ("
+                "file_hash TEXT NOT NULL, category_level INTEGER NOT NULL, "
+                "filename TEXT NOT NULL, created_at REAL NOT NULL, "
+                "PRIMARY KEY (file_hash, category_level))"
+            )
+            self._conn.commit()
+
+    def lookup(self, file_hash: str, category_level: int) -> Optional[str]:
+        """Return the filename already stored under this hash and level"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT filename FROM file_hashes "
+                "WHERE file_hash = ? AND category_level = ?",
+                (file_hash, category_level),
+            ).fetchone()
+        return row[0] if row else None
+
+    def add(self, file_hash: str, category_level: int, filename: str) -> bool:
+        """Claim a hash for a level, False if another file already holds it"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO file_hashes "
+                "(file_hash, category_level, filename, created_at) VALUES (?, ?, ?, ?)",
+                (file_hash, category_level, filename, time.time()),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def remove(self, file_hash: str, category_level: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM file_hashes WHERE file_hash = ? AND category_level = ?",
+                (file_hash, category_level),
+            )
+            self._conn.commit()
+
+    def release_previous_revisions(
+        self, filename: str, category_level: int, file_hash: str
+    ) -> None:
+        """Drop the claims older revisions of a file hold for a level"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM file_hashes WHERE filename = ? AND category_level = ? "
+                "AND file_hash != ?",
+                (filename, category_level, file_hash),
+            )
+            self._conn.commit()
+
+
+# Global file hash index instance
+file_hash_index = FileHashIndex(os.path.join(settings.data_dir, "file_hashes.sqlite3"))
@@ -0,0 +1,260 @@
+from typing import AsyncIterator, List, Set
+from langchain_core.documents import Document
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client.http.models import (
+    FieldCondition,
+    Filter,
+    MatchAny,
+    MatchValue,
+    PointIdsList,
+    PointStruct,
+)
+from app.config.settings import settings
+from app.services.chunk_manifest import chunk_manifest, chunk_point_ids
+from app.services.sparse_encoder import encode_document
+from app.services.upload_store import legacy_upload_url
+from app.services.vector_store import (
+    CATEGORY_LEVEL_KEY,
+    SPARSE_VECTOR_NAME,
+    vector_store_registry,
+)
+import asyncio
+import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Substrings of embedding API errors that are worth retrying (quota / overload)
+RETRYABLE_ERROR_MARKERS = (
+    "429",
+    "resource_exhausted",
+    "resource exhausted",
+    "quota",
+    "rate limit",
+    "503",
+    "unavailable",
+)
+
+
+class BatchIndexingError(Exception):
+    """Raised when a batch still fails after all retries"""
+
+
+def is_retryable_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in RETRYABLE_ERROR_MARKERS)
+
+
+async def _embed_with_retry(texts: List[str]) -> List[List[float]]:
+    """Embed one batch, backing off exponentially on quota errors"""
+    max_retries = settings.ingestion_embed_max_retries
+    for attempt in range(max_retries + 1):
+        try:
+            return await asyncio.to_thread(settings.embedding.embed_documents, texts)
+        except Exception as e:
+            if attempt == max_retries or not is_retryable_error(e):
+                raise
+            delay = settings.ingestion_embed_backoff * (2**attempt)
+            delay += random.uniform(0, delay / 2)
+            logger.warning(
+                f"Embedding batch rate limited, retrying in {delay:.1f}s "
+                f"(attempt {attempt + 1}/{max_retries}): {e}"
+            )
+            await asyncio.sleep(delay)
+
+
+def _batch_is_committed(collection_name: str, ids: List[str]) -> bool:
+    points = vector_store_registry.client.retrieve(
+        collection_name=collection_name,
+        ids=ids,
+        with_payload=False,
+        with_vectors=False,
+    )
+    return len(points) == len(ids)
+
+
+async def index_chunks(
+    chunks: List[Document],
+    ids: List[str],
+    collection_name: str,
+    resume: bool = False,
+) -> AsyncIterator[dict]:
+    """Embed and upsert chunks batch by batch, yielding progress as batches commit
+
+    Batches of ``settings.ingestion_embed_batch_size`` chunks are embedded
+    with at most ``settings.ingestion_embed_concurrency`` batches in flight,
+    and each batch is upserted as soon as its vectors arrive, together with
+    the chunks' BM25 sparse vectors when the collection has them. With
+    ``resume`` (and deterministic ``ids``) batches that an earlier run
+    already committed are skipped, so a retry continues where it stopped.
+
+    Raises BatchIndexingError when a batch cannot be indexed.
+    """
+    batch_size = settings.ingestion_embed_batch_size
+    batches = [
+        (chunks[start : start + batch_size], ids[start : start + batch_size])
+        for start in range(0, len(chunks), batch_size)
+    ]
+    semaphore = asyncio.Semaphore(settings.ingestion_embed_concurrency)
+    with_sparse = await asyncio.to_thread(
+        vector_store_registry.has_sparse_vectors, collection_name
+    )
+
+    async def index_batch(batch: List[Document], batch_ids: List[str]) -> int:
+        async with semaphore:
+            if resume and await asyncio.to_thread(
+                _batch_is_committed, collection_name, batch_ids
+            ):
+                return len(batch)
+
+            vectors = await _embed_with_retry([doc.page_content for doc in batch])
+            if with_sparse:
+                vectors = [
+                    {"": vector, SPARSE_VECTOR_NAME: encode_document(doc.page_content)}
+                    for doc, vector in zip(batch, vectors)
+                ]
+            points = [
+                PointStruct(
+                    id=point_id,
+                    vector=vector,
+                    payload={
+                        QdrantVectorStore.CONTENT_KEY: doc.page_content,
+                        QdrantVectorStore.METADATA_KEY: doc.metadata,
+                    },
+                )
+                for point_id, doc, vector in zip(batch_ids, batch, vectors)
+            ]
+            await asyncio.to_thread(
+                vector_store_registry.client.upsert,
+                collection_name=collection_name,
+                points=points,
+                wait=True,
+            )
+            return len(batch)
+
+    tasks = [asyncio.create_task(index_batch(*batch)) for batch in batches]
+    indexed = 0
+    try:
+        for finished in asyncio.as_completed(tasks):
+            try:
+                indexed += await finished
+            except Exception as e:
+                raise BatchIndexingError(
+                    f"{indexed}/{len(chunks)} chunks committed before failure: {e}"
+                ) from e
+
+            yield {
+                "step": "batch_indexed",
+                "message": f"Indexed {indexed}/{len(chunks)} chunks",
+                "progress": 90 + int(5 * indexed / max(len(chunks), 1)),
+                "chunks_indexed": indexed,
+                "chunks_total": len(chunks),
+            }
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _stored_point_ids(
+    collection_name: str, sources: List[str], category_level: int
+) -> Set[str]:
+    """Point IDs Qdrant holds for a document that has no manifest entry yet"""
+    scroll_filter = Filter(
+        must=[
+            FieldCondition(key="metadata.source", match=MatchAny(any=sources)),
+            FieldCondition(
+                key=CATEGORY_LEVEL_KEY, match=MatchValue(value=category_level)
+            ),
+        ]
+    )
+    point_ids = set()
+    offset = None
+    while True:
+        points, offset = vector_store_registry.client.scroll(
+            collection_name=collection_name,
+            scroll_filter=scroll_filter,
+            limit=256,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
+        )
+        point_ids.update(str(point.id) for point in points)
+        if offset is None:
+            return point_ids
+
+
+async def sync_document_chunks(
+    chunks: List[Document],
+    doc_id: str,
+    safe_filename: str,
+    category_level: int,
+    file_hash: str,
+    collection_name: str,
+    resume: bool = False,
+) -> AsyncIterator[dict]:
+    """Bring the stored chunks of a document in line with its current revision
+
+    Chunks get content-addressed IDs and are diffed against the document's
+    manifest: only new chunks are embedded, unchanged ones just get the new
+    file hash and source link, vanished ones are deleted. A document
+    ingested before the manifest existed is diffed against its points in
+    Qdrant instead, under its current or its flat legacy source link.
+    """
+    ids = chunk_point_ids(doc_id, chunks)
+    for chunk in chunks:
+        chunk.metadata["document_id"] = doc_id
+
+    stored = chunk_manifest.point_ids(doc_id)
+    if stored is None:
+        stored = set()
+        if chunks:
+            stored = await asyncio.to_thread(
+                _stored_point_ids,
+                collection_name,
+                [chunks[0].metadata["source"], legacy_upload_url(safe_filename)],
+                category_level,
+            )
+
+    new = [index for index, point_id in enumerate(ids) if point_id not in stored]
+    kept = [point_id for point_id in ids if point_id in stored]
+    vanished = list(stored - set(ids))
+
+    yield {
+        "step": "diffed",
+        "message": (
+            f"{len(new)} new, {len(kept)} unchanged, {len(vanished)} removed chunks"
+        ),
+        "progress": 90,
+        "chunks_new": len(new),
+        "chunks_unchanged": len(kept),
+        "chunks_removed": len(vanished),
+    }
+
+    if new:
+        async for progress in index_chunks(
+            [chunks[index] for index in new],
+            [ids[index] for index in new],
+            collection_name,
+            resume=resume,
+        ):
+            yield progress
+
+    client = vector_store_registry.client
+    if kept:
+        await asyncio.to_thread(
+            client.set_payload,
+            collection_name=collection_name,
+            payload={"file_hash": file_hash, "source": chunks[0].metadata["source"]},
+            points=kept,
+            key=QdrantVectorStore.METADATA_KEY,
+            wait=True,
+        )
+    if vanished:
+        await asyncio.to_thread(
+            client.delete,
+            collection_name=collection_name,
+            points_selector=PointIdsList(points=vanished),
+            wait=True,
+        )
+
+    chunk_manifest.replace(doc_id, safe_filename, category_level, file_hash, ids)
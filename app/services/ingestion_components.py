@@ -0,0 +1,98 @@
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+from langchain_core.documents import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from app.config.settings import settings
+import threading
+import queue
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Formats whose docling pipelines (layout / OCR models) are loaded up front
+WARM_FORMATS = ["pdf"]
+
+
+class IngestionComponents:
+    """Process-wide pool of warm document converters and the shared splitter
+
+    A DocumentConverter loads docling's layout and OCR models the first time
+    a pipeline is used, which used to happen on every upload. Converters are
+    now built once (``settings.ingestion_converters`` of them, each used by
+    one thread at a time) and borrowed per conversion. The text splitter
+    holds no state and is shared as is.
+
+    docling is only imported when the first converter is built, importing
+    the upload routes does not load its ML stack.
+    """
+
+    def __init__(self):
+        self._converters: Optional[queue.Queue] = None
+        self._splitter: Optional[RecursiveCharacterTextSplitter] = None
+        self._lock = threading.Lock()
+
+    @property
+    def splitter(self) -> RecursiveCharacterTextSplitter:
+        if self._splitter is None:
+            self.warm_up()
+        return self._splitter
+
+    def warm_up(self) -> None:
+        """Build the converters and load their models, a no-op once warm"""
+        if self._converters is not None:
+            return
+
+        with self._lock:
+            if self._converters is not None:
+                return
+
+            started = time.perf_counter()
+            converters = queue.Queue()
+            for _ in range(max(1, settings.ingestion_converters)):
+                converters.put(self._build_converter())
+
+            self._splitter = RecursiveCharacterTextSplitter(
+                chunk_size=1000, chunk_overlap=200
+            )
+            self._converters = converters
+            logger.info(
+                f"Ingestion components ready in {time.perf_counter() - started:.2f}s"
+            )
+
+    def _build_converter(self):
+        from docling.datamodel.base_models import InputFormat
+        from docling.document_converter import DocumentConverter
+
+        converter = DocumentConverter()
+        for input_format in WARM_FORMATS:
+            try:
+                converter.initialize_pipeline(InputFormat(input_format))
+            except Exception as e:
+                logger.warning(f"Failed to preload {input_format} pipeline: {e}")
+        return converter
+
+    @contextmanager
+    def converter(self) -> Iterator:
+        """Borrow a converter, waiting while all of them are in use"""
+        self.warm_up()
+        converter = self._converters.get()
+        try:
+            yield converter
+        finally:
+            self._converters.put(converter)
+
+    def split(self, documents: List[Document]) -> List[Document]:
+        return self.splitter.split_documents(documents)
+
+
+# Global ingestion components instance
+ingestion_components = IngestionComponents()
+
+
+def warm_up_worker() -> None:
+    """Process pool initializer: load the ingestion models before the first job"""
+    try:
+        ingestion_components.warm_up()
+    except Exception as e:
+        logger.error(f"Failed to warm up ingestion components: {e}")
@@ -0,0 +1,390 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, List, Optional, Tuple
+from uuid import uuid4
+from app.config.settings import settings
+from app.services.add_knowledge import add_knowledge
+from app.services.answer_cache import answer_cache
+from app.services.bulk_ingestion import BulkIngestionPipeline
+from app.services.file_index import file_hash_index
+from app.services.ingestion_components import warm_up_worker
+from app.services.metrics import record_stage_timings
+from app.services.vector_store import target_collection_name, vector_store_registry
+import multiprocessing
+import threading
+import asyncio
+import sqlite3
+import json
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed", "stopped")
+
+
+class JobStore:
+    """sqlite-backed table of ingestion jobs and their progress events
+
+    The API process and the ingestion worker processes each open their own
+    store on the same database file, so progress written by a worker is
+    visible to the status and event endpoints.
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    filepath TEXT NOT NULL,
+                    category_level INTEGER NOT NULL,
+                    file_hash TEXT,
+                    kind TEXT NOT NULL DEFAULT 'file',
+                    files TEXT,
+                    status TEXT NOT NULL,
+                    step TEXT,
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    message TEXT,
+                    result TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS job_events (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    event TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, seq)
+                );
+                """
+            )
+            # Databases created before these columns were tracked
+            columns = [
+                row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")
+            ]
+            for column, definition in (
+                ("file_hash", "TEXT"),
+                ("kind", "TEXT NOT NULL DEFAULT 'file'"),
+                ("files", "TEXT"),
+            ):
+                if column not in columns:
+                    self._conn.execute(
+                        f"ALTER TABLE jobs ADD COLUMN {column} {definition}"
+                    )
+            self._conn.commit()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["files"] = json.loads(job["files"]) if job["files"] else None
+        return job
+
+    def create_job(
+        self,
+        filename: str,
+        filepath: str,
+        category_level: int,
+        file_hash: Optional[str] = None,
+    ) -> dict:
+        job_id = str(uuid4())
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, filename, filepath, category_level, file_hash, "
+                "status, step, progress, message, created_at, updated_at) VALUES "
+                "(?, ?, ?, ?, ?, 'queued', 'queued', 0, 'Waiting for a worker', ?, ?)",
+                (job_id, filename, filepath, category_level, file_hash, now, now),
+            )
+            self._conn.commit()
+        self.add_event(
+            job_id, {"step": "queued", "message": "Waiting for a worker", "progress": 0}
+        )
+        return self.get_job(job_id)
+
+    def create_bulk_job(self, files: List[dict], category_level: int) -> dict:
+        """Create one job that ingests several saved files through the bulk pipeline"""
+        job_id = str(uuid4())
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, filename, filepath, category_level, kind, "
+                "files, status, step, progress, message, created_at, updated_at) "
+                "VALUES (?, ?, '', ?, 'bulk', ?, 'queued', 'queued', 0, "
+                "'Waiting for a worker', ?, ?)",
+                (
+                    job_id,
+                    f"{len(files)} files",
+                    category_level,
+                    json.dumps(files, ensure_ascii=False),
+                    now,
+                    now,
+                ),
+            )
+            self._conn.commit()
+        self.add_event(
+            job_id, {"step": "queued", "message": "Waiting for a worker", "progress": 0}
+        )
+        return self.get_job(job_id)
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def pending_jobs(self) -> List[dict]:
+        """Jobs that were queued or running when the API last stopped"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN ('queued', 'running') "
+                "ORDER BY created_at"
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def add_event(self, job_id: str, event: dict) -> None:
+        """Append a progress event and mirror it on the job row"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO job_events (job_id, seq, event, created_at) VALUES "
+                "(?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM job_events WHERE job_id = ?), ?, ?)",
+                (job_id, job_id, json.dumps(event, ensure_ascii=False), now),
+            )
+            self._conn.execute(
+                "UPDATE jobs SET step = ?, progress = ?, message = ?, "
+                "result = COALESCE(?, result), updated_at = ? WHERE id = ?",
+                (
+                    event.get("step"),
+                    event.get("progress", 0),
+                    event.get("message"),
+                    json.dumps(event["data"], ensure_ascii=False)
+                    if event.get("data")
+                    else None,
+                    now,
+                    job_id,
+                ),
+            )
+            self._conn.commit()
+
+    def get_events(self, job_id: str, after_seq: int = 0) -> List[Tuple[int, dict]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, event FROM job_events WHERE job_id = ? AND seq > ? "
+                "ORDER BY seq",
+                (job_id, after_seq),
+            ).fetchall()
+        return [(row["seq"], json.loads(row["event"])) for row in rows]
+
+    def set_status(self, job_id: str, status: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ?, "
+                "attempts = attempts + (CASE WHEN ? = 'running' THEN 1 ELSE 0 END) "
+                "WHERE id = ?",
+                (status, time.time(), status, job_id),
+            )
+            self._conn.commit()
+
+
+# The store of a worker process, one connection for every job it runs
+_worker_store: Optional[JobStore] = None
+_worker_store_lock = threading.Lock()
+
+
+def _job_store() -> JobStore:
+    global _worker_store
+    if _worker_store is None:
+        with _worker_store_lock:
+            if _worker_store is None:
+                _worker_store = JobStore(settings.ingestion_jobs_db)
+    return _worker_store
+
+
+def run_ingestion_job(job_id: str, resume: bool = False) -> str:
+    """Process pool entry point: run add_knowledge for a job and record its progress"""
+    store = _job_store()
+    job = store.get_job(job_id)
+    store.set_status(job_id, "running")
+
+    if job["kind"] == "bulk":
+        events = BulkIngestionPipeline(
+            job["files"], job["category_level"], resume=resume
+        ).run()
+    else:
+        events = add_knowledge(
+            job["filepath"],
+            job["filename"],
+            job["category_level"],
+            file_hash=job["file_hash"],
+            resume=resume,
+        )
+
+    async def consume() -> str:
+        status = "completed"
+        async for event in events:
+            store.add_event(job_id, event)
+            if event.get("error"):
+                status = "failed"
+            elif event.get("stopped"):
+                status = "stopped"
+        return status
+
+    status = asyncio.run(consume())
+    store.set_status(job_id, status)
+    if status == "failed":
+        _release_file_hash(job)
+    return status
+
+
+def _release_file_hash(job: dict) -> None:
+    """Let a failed upload be retried by freeing its claim in the hash index"""
+    if job["kind"] == "bulk":
+        for file in job["files"]:
+            file_hash_index.remove(file["file_hash"], job["category_level"])
+    elif job["file_hash"]:
+        file_hash_index.remove(job["file_hash"], job["category_level"])
+
+
+class IngestionJobManager:
+    """Run uploads as jobs on a process pool so conversion never blocks the API
+
+    At most ``settings.ingestion_max_workers`` jobs run at the same time.
+    Jobs that were queued or running when the API stopped are resumed on
+    the next start.
+    """
+
+    def __init__(self):
+        self._store: Optional[JobStore] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def store(self) -> JobStore:
+        if self._store is None:
+            self._store = JobStore(settings.ingestion_jobs_db)
+        return self._store
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        """Start the worker pool and resume interrupted jobs"""
+        self._executor = ProcessPoolExecutor(
+            max_workers=settings.ingestion_max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_up_worker,
+        )
+        for job in self.store.pending_jobs():
+            logger.info(f"Resuming ingestion job {job['id']} ({job['filename']})")
+            self.store.add_event(
+                job["id"],
+                {"step": "resumed", "message": "Resuming after restart", "progress": 0},
+            )
+            self._schedule(job, resume=True)
+
+    async def stop(self) -> None:
+        """Stop the worker pool, unfinished jobs are resumed on next start"""
+        if self._executor is not None:
+            await asyncio.to_thread(
+                self._executor.shutdown, wait=False, cancel_futures=True
+            )
+            self._executor = None
+
+    def submit(
+        self,
+        filename: str,
+        filepath: str,
+        category_level: int,
+        file_hash: Optional[str] = None,
+    ) -> dict:
+        """Queue a saved upload for ingestion and return its job record"""
+        job = self.store.create_job(filename, filepath, category_level, file_hash)
+        self._schedule(job)
+        return job
+
+    def submit_bulk(self, files: List[dict], category_level: int) -> dict:
+        """Queue several saved uploads as one pipelined bulk ingestion job"""
+        job = self.store.create_bulk_job(files, category_level)
+        self._schedule(job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        return self.store.get_job(job_id)
+
+    def _schedule(self, job: dict, resume: bool = False) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._executor, run_ingestion_job, job["id"], resume
+        )
+        future.add_done_callback(lambda f: self._on_done(job, f))
+
+    def _on_done(self, job: dict, future: asyncio.Future) -> None:
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Ingestion job {job['id']} crashed: {error}")
+            self.store.add_event(
+                job["id"],
+                {
+                    "step": "error",
+                    "message": f"Unhandled error: {str(error)}",
+                    "progress": 0,
+                    "error": True,
+                },
+            )
+            self.store.set_status(job["id"], "failed")
+            _release_file_hash(job)
+            return
+
+        if future.result() == "completed":
+            # The worker process has its own caches, invalidate the API's copies
+            # here (the collection may have been created by the worker)
+            answer_cache.invalidate_level(job["category_level"])
+            vector_store_registry.refresh(target_collection_name(job["category_level"]))
+            self._record_metrics(job["id"])
+
+    def _record_metrics(self, job_id: str) -> None:
+        """Observe the stage timings a worker reported, its own metrics are not scraped"""
+        result = (self.store.get_job(job_id) or {}).get("result") or {}
+        if "files" in result:
+            for file in result["files"]:
+                record_stage_timings(file.get("stage_seconds", {}))
+        else:
+            record_stage_timings(result.get("stage_seconds", {}))
+
+    async def events(
+        self, job_id: str, poll_interval: float = 0.5
+    ) -> AsyncIterator[dict]:
+        """Replay a job's progress events and follow new ones until it finishes"""
+        last_seq = 0
+        while True:
+            for seq, event in self.store.get_events(job_id, last_seq):
+                last_seq = seq
+                yield event
+
+            job = self.store.get_job(job_id)
+            if job is None or job["status"] in TERMINAL_STATUSES:
+                # Pick up events written between the last poll and the status change
+                for seq, event in self.store.get_events(job_id, last_seq):
+                    last_seq = seq
+                    yield event
+                return
+
+            await asyncio.sleep(poll_interval)
+
+
+# Global ingestion job manager instance
+ingestion_jobs = IngestionJobManager()
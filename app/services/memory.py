@@ -1,6 +1,8 @@
 from typing import List
 from langchain_core.messages import HumanMessage, AIMessage
 from app.config.settings import settings
+from app.services.metrics import MEM0_LATENCY
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,13 +11,16 @@ logger = logging.getLogger(__name__)
 class MemoryService:
     """Service for handling user memory operations"""
 
-    def __init__(self):
-        self.memory = settings.memory
+    @property
+    def memory(self):
+        """mem0 instance, built on first use"""
+        return settings.memory
 
     def search_user_memory(self, query: str, user_id: str) -> str:
         """Search for relevant memories for a specific user"""
         try:
-            search_result = self.memory.search(query=query, user_id=user_id)
+            with MEM0_LATENCY.labels(operation="search").time():
+                search_result = self.memory.search(query=query, user_id=user_id)
             search_items = search_result.get("results", [])
 
             # Combine all relevant memories into one string
@@ -30,18 +35,61 @@ class MemoryService:
             logger.error(f"Failed to search user memory: {e}")
             return ""
 
-    def store_conversation(self, messages: List, user_id: str) -> bool:
-        """Store conversation in user's memory"""
+    def search_user_memory_by_vector(
+        self, query: str, vector: List[float], user_id: str, limit: int = 100
+    ) -> str:
+        """Search a user's memories with an already computed query vector
+
+        Without a vector (embedding the query failed) mem0 embeds the text
+        itself, so the turn still gets the user's memories.
+        """
+        if not vector:
+            return self.search_user_memory(query, user_id)
+
+        try:
+            with MEM0_LATENCY.labels(operation="search").time():
+                memories = self.memory.vector_store.search(
+                    query=query,
+                    vectors=vector,
+                    limit=limit,
+                    filters={"user_id": user_id},
+                )
+
+            # Combine all relevant memories into one string
+            user_memory = "\n".join(
+                [mem.payload["data"] for mem in memories if mem.payload.get("data")]
+            )
+
+            logger.info(f"Found {len(memories)} memory items for user {user_id}")
+            return user_memory
+
+        except Exception as e:
+            logger.error(f"Failed to search user memory by vector: {e}")
+            return ""
+
+    async def asearch_user_memory_by_vector(
+        self, query: str, vector: List[float], user_id: str, limit: int = 100
+    ) -> str:
+        """Async variant of search_user_memory_by_vector that keeps the event loop free"""
+        return await asyncio.to_thread(
+            self.search_user_memory_by_vector, query, vector, user_id, limit
+        )
+
+    def to_memory_data(self, messages: List) -> List[dict]:
+        """Convert conversation messages to mem0's message format"""
+        memory_data = []
+        for msg in messages:
+            if isinstance(msg, HumanMessage):
+                memory_data.append({"role": "user", "content": msg.content})
+            # elif isinstance(msg, AIMessage):
+            #     memory_data.append({"role": "assistant", "content": msg.content})
+        return memory_data
+
+    def store_memory_data(self, memory_data: List[dict], user_id: str) -> bool:
+        """Store already converted messages in user's memory"""
         try:
-            # Convert messages to memory format
-            memory_data = []
-            for msg in messages:
-                if isinstance(msg, HumanMessage):
-                    memory_data.append({"role": "user", "content": msg.content})
-                # elif isinstance(msg, AIMessage):
-                #     memory_data.append({"role": "assistant", "content": msg.content})
-
-            self.memory.add(memory_data, user_id=user_id)
+            with MEM0_LATENCY.labels(operation="add").time():
+                self.memory.add(memory_data, user_id=user_id)
             logger.info(f"Stored conversation for user {user_id}")
             return True
 
@@ -49,6 +97,10 @@ class MemoryService:
             logger.error(f"Failed to store conversation: {e}")
             return False
 
+    def store_conversation(self, messages: List, user_id: str) -> bool:
+        """Store conversation in user's memory"""
+        return self.store_memory_data(self.to_memory_data(messages), user_id)
+
 
 # Global memory service instance
 memory_service = MemoryService()
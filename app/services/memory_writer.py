@@ -0,0 +1,147 @@
+from typing import Dict, List, Optional, Tuple
+from app.config.settings import settings
+from app.services.memory import memory_service
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryWriter:
+    """Bounded background queue for mem0 conversation writes
+
+    ``Memory.add`` runs its own LLM extraction and embedding pass, so it is
+    kept off the request path. Turns are queued, consecutive turns of the
+    same user are coalesced into one ``add`` call, and a batch is flushed
+    once it is full or ``flush_interval`` seconds have passed.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = settings.memory_writer_queue_size,
+        batch_size: int = settings.memory_writer_batch_size,
+        flush_interval: float = settings.memory_writer_flush_interval,
+    ):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters exposed through stats()
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the background worker on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+        logger.info("Memory writer started")
+
+    def enqueue(self, messages: List, user_id: str) -> bool:
+        """Hand a conversation turn to the writer without waiting for mem0"""
+        memory_data = memory_service.to_memory_data(messages)
+        if not memory_data:
+            return True
+
+        if not self.running:
+            self.dropped += 1
+            logger.warning(f"Memory writer not running, dropped turn for user {user_id}")
+            return False
+
+        try:
+            self._queue.put_nowait((user_id, memory_data))
+            self.enqueued += 1
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Memory queue full, dropped turn for user {user_id}")
+            return False
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Drain queued turns, then stop the worker"""
+        if not self.running:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.dropped += self._queue.qsize()
+            logger.warning(
+                f"Memory writer drain timed out, dropped {self._queue.qsize()} turns"
+            )
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        logger.info("Memory writer stopped")
+
+    def stats(self) -> dict:
+        """Queue depth and write/drop counters"""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue_size": self.max_queue_size,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+
+            # Keep collecting until the batch is full or the flush interval ends
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: List[Tuple[str, List[dict]]]) -> None:
+        # Coalesce every turn of a user into a single mem0 add call
+        grouped: Dict[str, List[dict]] = {}
+        for user_id, memory_data in batch:
+            grouped.setdefault(user_id, []).extend(memory_data)
+
+        for user_id, memory_data in grouped.items():
+            success = await asyncio.to_thread(
+                memory_service.store_memory_data, memory_data, user_id
+            )
+            if success:
+                self.written += 1
+            else:
+                self.failed += 1
+
+        self.batches += 1
+        logger.info(f"Flushed {len(batch)} turns for {len(grouped)} users to memory")
+
+
+# Global memory writer instance
+memory_writer = MemoryWriter()
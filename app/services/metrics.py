@@ -0,0 +1,104 @@
+from typing import Awaitable, Callable
+from prometheus_client import Counter, Histogram
+import time
+
+# Buckets from a cache hit (milliseconds) up to a slow Gemini answer
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+# Ingestion stages take from milliseconds to many minutes for large files
+STAGE_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+NODE_LATENCY = Histogram(
+    "bejo_graph_node_seconds",
+    "Latency of each agent graph node",
+    ["node"],
+    buckets=LATENCY_BUCKETS,
+)
+QDRANT_QUERY_LATENCY = Histogram(
+    "bejo_qdrant_query_seconds",
+    "Latency of knowledge queries per Qdrant collection",
+    ["collection", "mode"],
+    buckets=LATENCY_BUCKETS,
+)
+EMBEDDING_LATENCY = Histogram(
+    "bejo_embedding_seconds",
+    "Latency of embedding model calls (cache misses only)",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+MEM0_LATENCY = Histogram(
+    "bejo_mem0_seconds",
+    "Latency of mem0 memory operations",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_LATENCY = Histogram(
+    "bejo_llm_seconds",
+    "Latency of Gemini calls",
+    ["purpose"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "bejo_llm_tokens",
+    "Gemini tokens used, by user category and token kind",
+    ["category", "kind"],
+)
+SUMMARY_TOKENS = Counter(
+    "bejo_summary_tokens",
+    "Gemini tokens used to summarize conversation history, by token kind",
+    ["kind"],
+)
+ROUTE_DECISIONS = Counter(
+    "bejo_route_decisions",
+    "Chat turns by the path the router sent them down",
+    ["route"],
+)
+INGESTION_STAGE_LATENCY = Histogram(
+    "bejo_ingestion_stage_seconds",
+    "Duration of each add_knowledge stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+
+def timed_node(name: str, node: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    """Wrap an async graph node so its latency is recorded under ``name``
+
+    No ``functools.wraps``: LangGraph follows ``__wrapped__`` when compiling
+    and resolves the node's ``settings.llm`` style attribute chains, which
+    would build the lazily initialized models at import.
+    """
+
+    async def wrapper(state):
+        started = time.perf_counter()
+        try:
+            return await node(state)
+        finally:
+            NODE_LATENCY.labels(node=name).observe(time.perf_counter() - started)
+
+    wrapper.__name__ = node.__name__
+    wrapper.__doc__ = node.__doc__
+    return wrapper
+
+
+def record_token_usage(category: int, usage: dict) -> None:
+    """Count the tokens of one LLM call for a user category"""
+    for kind in ("input", "output"):
+        tokens = usage.get(f"{kind}_tokens", 0)
+        if tokens:
+            LLM_TOKENS.labels(category=str(category), kind=kind).inc(tokens)
+
+
+def record_summary_tokens(usage: dict) -> None:
+    """Count the tokens of a history summary, kept apart from the answers"""
+    for kind in ("input", "output"):
+        tokens = usage.get(f"{kind}_tokens", 0)
+        if tokens:
+            SUMMARY_TOKENS.labels(kind=kind).inc(tokens)
+
+
+def record_stage_timings(stage_seconds: dict) -> None:
+    for stage, seconds in stage_seconds.items():
+        INGESTION_STAGE_LATENCY.labels(stage=stage).observe(seconds)
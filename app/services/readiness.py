@@ -0,0 +1,75 @@
+from typing import Awaitable, Callable, Dict
+from app.config.settings import settings
+from app.services.conversations import conversation_store
+from app.services.ingestion_jobs import ingestion_jobs
+from app.services.memory_writer import memory_writer
+from app.services.vector_store import (
+    knowledge_collection_names,
+    vector_store_registry,
+)
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up_dependencies() -> None:
+    """Build the models and the Qdrant handles, run off the event loop at startup"""
+    try:
+        settings.warm_up_models()
+    except Exception as e:
+        logger.warning(f"Model warm-up failed, models are built on first use: {e}")
+    vector_store_registry.warm_up(knowledge_collection_names())
+
+
+async def _check_qdrant() -> None:
+    await asyncio.to_thread(vector_store_registry.client.get_collections)
+
+
+async def _check_models() -> None:
+    # Only reports the startup warm-up, building models in a probe could
+    # leave threads stuck on a slow provider behind every timed out check
+    if settings.model_warm_up and not settings.models_ready:
+        raise RuntimeError("models are not warmed up yet")
+
+
+async def _check_conversations() -> None:
+    if conversation_store.checkpointer is None:
+        raise RuntimeError("conversation store is not open")
+
+
+async def _check_memory_writer() -> None:
+    if not memory_writer.running:
+        raise RuntimeError("memory writer is not running")
+
+
+async def _check_ingestion_jobs() -> None:
+    if not ingestion_jobs.running:
+        raise RuntimeError("ingestion worker pool is not started")
+
+
+READINESS_CHECKS: Dict[str, Callable[[], Awaitable[None]]] = {
+    "qdrant": _check_qdrant,
+    "models": _check_models,
+    "conversations": _check_conversations,
+    "memory_writer": _check_memory_writer,
+    "ingestion_jobs": _check_ingestion_jobs,
+}
+
+
+async def check_readiness() -> dict:
+    """Run every dependency check concurrently, each bounded by the readiness timeout"""
+
+    async def run(check: Callable[[], Awaitable[None]]) -> dict:
+        try:
+            await asyncio.wait_for(check(), timeout=settings.readiness_timeout)
+            return {"ok": True}
+        except asyncio.TimeoutError:
+            return {"ok": False, "error": "timed out"}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    results = await asyncio.gather(*(run(check) for check in READINESS_CHECKS.values()))
+    checks = dict(zip(READINESS_CHECKS, results))
+    ready = all(check["ok"] for check in checks.values())
+    return {"status": "ready" if ready else "not_ready", "checks": checks}
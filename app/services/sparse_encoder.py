@@ -0,0 +1,57 @@
+from collections import Counter
+from typing import Dict, List
+from qdrant_client.http.models import SparseVector
+from app.config.settings import settings
+import hashlib
+import re
+
+# Words, numbers and codes such as "BJ-2041" or "v1.2" kept as one token
+TOKEN_PATTERN = re.compile(r"[0-9a-z]+(?:[-_./][0-9a-z]+)*")
+COMPOUND_SEPARATORS = re.compile(r"[-_./]")
+
+# BM25 term frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased tokens, codes also contribute their parts ("bj-2041" -> "bj", "2041")"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        parts = COMPOUND_SEPARATORS.split(token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part)
+    return tokens
+
+
+def _token_index(token: str) -> int:
+    """Stable 32-bit index of a token, the same in every process"""
+    return int.from_bytes(
+        hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little"
+    )
+
+
+def _to_sparse_vector(weights: Dict[int, float]) -> SparseVector:
+    indices = sorted(weights)
+    return SparseVector(indices=indices, values=[weights[i] for i in indices])
+
+
+def encode_document(text: str) -> SparseVector:
+    """BM25 term weights of a chunk, the IDF part is applied by Qdrant at query time"""
+    counts = Counter(tokenize(text))
+    length = sum(counts.values())
+    norm = BM25_K1 * (
+        1 - BM25_B + BM25_B * length / settings.sparse_average_chunk_tokens
+    )
+
+    weights: Dict[int, float] = {}
+    for token, tf in counts.items():
+        index = _token_index(token)
+        weights[index] = weights.get(index, 0.0) + tf * (BM25_K1 + 1) / (tf + norm)
+    return _to_sparse_vector(weights)
+
+
+def encode_query(text: str) -> SparseVector:
+    """Query terms with unit weight, so the score is the sum of their BM25 weights"""
+    return _to_sparse_vector({_token_index(token): 1.0 for token in set(tokenize(text))})
@@ -0,0 +1,240 @@
+from typing import Optional, Tuple
+from app.config.settings import settings
+import threading
+import hashlib
+import sqlite3
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "uploads"))
+BASE_URL = os.getenv("BASE_URL")
+
+
+def upload_url(safe_filename: str, category_level: int) -> str:
+    return f"{BASE_URL}/uploads/{category_level}/{safe_filename}"
+
+
+def legacy_upload_url(safe_filename: str) -> str:
+    """Source link of knowledge ingested before uploads were scoped per level"""
+    return f"{BASE_URL}/uploads/{safe_filename}"
+
+
+def compute_file_sha256(filepath: str) -> str:
+    """SHA-256 of a file on disk, read in chunks"""
+    file_hash = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+class FilenameTakenError(Exception):
+    """Raised when a different file already holds a name at a level"""
+
+
+class UploadStore:
+    """Content-addressed store for uploaded files
+
+    Every distinct file is stored once under ``objects/ab/cd/<sha256><ext>``
+    (the extension tells docling the format), whatever name it was uploaded
+    under. Public names are aliases in a local table mapping the category
+    level and filename to the hash, ``/uploads/<level>/<filename>`` is
+    served through them. Like document identities and the file hash index,
+    aliases are scoped per level, so an upload to one level never changes
+    what another level's links serve. A blob is deleted once no alias at
+    any level points to it any more.
+
+    Links from before the store was scoped per level are flat
+    (``/uploads/<filename>``). Their aliases are kept read-only as legacy
+    aliases, and files saved by name in the upload directory before the
+    store existed are adopted as legacy aliases the first time their name
+    is looked up.
+    """
+
+    def __init__(self, root: str, db_path: str):
+        self.root = root
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                "file_hash TEXT PRIMARY KEY, path TEXT NOT NULL, "
+                "size INTEGER NOT NULL, created_at REAL NOT NULL)"
+            )
+            columns = [
+                row[1] for row in self._conn.execute("PRAGMA table_info(aliases)")
+            ]
+            if columns and "category_level" not in columns:
+                # Flat aliases from before they were scoped per level
+                self._conn.execute("ALTER TABLE aliases RENAME TO legacy_aliases")
+                self._conn.execute("DROP INDEX IF EXISTS aliases_by_hash")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS legacy_aliases ("
+                "filename TEXT PRIMARY KEY, file_hash TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS aliases ("
+                "category_level INTEGER NOT NULL, filename TEXT NOT NULL, "
+                "file_hash TEXT NOT NULL, created_at REAL NOT NULL, "
+                "PRIMARY KEY (category_level, filename))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS aliases_by_hash ON aliases (file_hash)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS legacy_aliases_by_hash "
+                "ON legacy_aliases (file_hash)"
+            )
+            self._conn.commit()
+
+    @property
+    def temp_dir(self) -> str:
+        """Where uploads are streamed before they are committed, same filesystem"""
+        path = os.path.join(self.root, "objects", "tmp")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _blob_path(self, file_hash: str, filename: str) -> str:
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(
+            self.root, "objects", file_hash[:2], file_hash[2:4], file_hash + extension
+        )
+
+    def _alias(self, category_level: int, filename: str) -> Optional[Tuple[str, str]]:
+        """(file_hash, blob path) of an alias, caller holds the lock"""
+        return self._conn.execute(
+            "SELECT a.file_hash, b.path FROM aliases a "
+            "JOIN blobs b ON b.file_hash = a.file_hash "
+            "WHERE a.category_level = ? AND a.filename = ?",
+            (category_level, filename),
+        ).fetchone()
+
+    def _legacy_alias(self, filename: str) -> Optional[Tuple[str, str]]:
+        """(file_hash, blob path) of a flat alias, caller holds the lock"""
+        row = self._conn.execute(
+            "SELECT a.file_hash, b.path FROM legacy_aliases a "
+            "JOIN blobs b ON b.file_hash = a.file_hash WHERE a.filename = ?",
+            (filename,),
+        ).fetchone()
+        if row is None:
+            row = self._adopt_legacy_file(filename)
+        return row
+
+    def _adopt_legacy_file(self, filename: str) -> Optional[Tuple[str, str]]:
+        legacy_path = os.path.join(self.root, filename)
+        if os.path.dirname(legacy_path) != self.root or not os.path.isfile(legacy_path):
+            return None
+
+        file_hash = compute_file_sha256(legacy_path)
+        path = self._store_blob(legacy_path, file_hash, filename)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO legacy_aliases (filename, file_hash, created_at) "
+            "VALUES (?, ?, ?)",
+            (filename, file_hash, time.time()),
+        )
+        self._conn.commit()
+        logger.info(f"Adopted {filename} into the upload store ({file_hash})")
+        return file_hash, path
+
+    def _store_blob(self, source_path: str, file_hash: str, filename: str) -> str:
+        """Move a file into the store, dropping it if the blob already exists"""
+        row = self._conn.execute(
+            "SELECT path FROM blobs WHERE file_hash = ?", (file_hash,)
+        ).fetchone()
+        if row is not None and os.path.exists(row[0]):
+            os.remove(source_path)
+            return row[0]
+
+        path = self._blob_path(file_hash, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = os.path.getsize(source_path)
+        os.replace(source_path, path)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO blobs (file_hash, path, size, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            (file_hash, path, size, time.time()),
+        )
+        return path
+
+    def _set_alias(self, category_level: int, filename: str, file_hash: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO aliases "
+            "(category_level, filename, file_hash, created_at) VALUES (?, ?, ?, ?)",
+            (category_level, filename, file_hash, time.time()),
+        )
+
+    def _collect(self, file_hash: str) -> None:
+        """Delete a blob no alias at any level points to, caller holds the lock"""
+        referenced = self._conn.execute(
+            "SELECT 1 FROM aliases WHERE file_hash = ? "
+            "UNION ALL SELECT 1 FROM legacy_aliases WHERE file_hash = ? LIMIT 1",
+            (file_hash, file_hash),
+        ).fetchone()
+        if referenced:
+            return
+        row = self._conn.execute(
+            "SELECT path FROM blobs WHERE file_hash = ?", (file_hash,)
+        ).fetchone()
+        self._conn.execute("DELETE FROM blobs WHERE file_hash = ?", (file_hash,))
+        if row is not None:
+            try:
+                os.remove(row[0])
+            except OSError:
+                pass
+
+    def resolve(self, category_level: int, filename: str) -> Optional[str]:
+        """Path of the blob behind a level's public filename, None if unknown"""
+        with self._lock:
+            alias = self._alias(category_level, filename)
+        return alias[1] if alias else None
+
+    def resolve_legacy(self, filename: str) -> Optional[str]:
+        """Path of the blob behind a flat link from before aliases had a level"""
+        with self._lock:
+            alias = self._legacy_alias(filename)
+        return alias[1] if alias else None
+
+    def put(
+        self,
+        temp_path: str,
+        file_hash: str,
+        filename: str,
+        category_level: int,
+        replace: bool = False,
+    ) -> str:
+        """Commit a streamed upload to a level and return its blob path
+
+        The name must be free at that level or already hold these bytes,
+        unless ``replace`` is set: the name is then pointed at the new
+        revision and the previous blob is collected when no alias at any
+        level uses it. Otherwise FilenameTakenError is raised, a revision
+        is never stored as a second document.
+        """
+        with self._lock:
+            alias = self._alias(category_level, filename)
+            previous_hash = alias[0] if alias else None
+            if previous_hash not in (None, file_hash) and not replace:
+                raise FilenameTakenError(
+                    f"A different file named '{filename}' already exists at level "
+                    f"{category_level}"
+                )
+
+            path = self._store_blob(temp_path, file_hash, filename)
+            self._set_alias(category_level, filename, file_hash)
+            if previous_hash not in (None, file_hash):
+                self._collect(previous_hash)
+            self._conn.commit()
+        return path
+
+
+# Global upload store instance
+upload_store = UploadStore(
+    UPLOAD_DIR, os.path.join(settings.data_dir, "uploads.sqlite3")
+)
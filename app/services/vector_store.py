@@ -0,0 +1,393 @@
+from typing import Dict, Iterable, List, Optional, Set
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    CollectionParamsDiff,
+    Disabled,
+    Distance,
+    FieldCondition,
+    Filter,
+    HnswConfigDiff,
+    Modifier,
+    PayloadSchemaType,
+    QuantizationSearchParams,
+    Range,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    SparseIndexParams,
+    SparseVectorParams,
+    VectorParams,
+    VectorParamsDiff,
+)
+from app.config.settings import settings
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_LEVELS = [1, 2, 3, 4]
+
+# Payload key of the access level in the tiered collection (langchain keeps
+# document metadata under the "metadata" payload key)
+CATEGORY_LEVEL_KEY = "metadata.category_level"
+
+# Named sparse vector holding the local BM25 weights of a chunk (the dense
+# vector stays unnamed so langchain keeps working on the collection)
+SPARSE_VECTOR_NAME = "bm25"
+
+
+def qdrant_client_options() -> dict:
+    """Connection settings shared by the sync and async Qdrant clients"""
+    return {
+        "url": settings.qdrant_url,
+        "api_key": settings.qdrant_api_key,
+        "prefer_grpc": settings.qdrant_prefer_grpc,
+        "grpc_port": settings.qdrant_grpc_port,
+        "timeout": settings.qdrant_timeout,
+    }
+
+
+def create_qdrant_client() -> QdrantClient:
+    return QdrantClient(**qdrant_client_options())
+
+
+def create_async_qdrant_client() -> AsyncQdrantClient:
+    return AsyncQdrantClient(**qdrant_client_options())
+
+
+def knowledge_collection_name(level: int) -> str:
+    """Name of the per-level Qdrant collection that holds knowledge for an access level"""
+    return f"bejo-knowledge-level-{level}"
+
+
+def is_tiered_storage() -> bool:
+    """Whether knowledge lives in the single tiered collection"""
+    return settings.knowledge_storage_mode == "tiered"
+
+
+def target_collection_name(level: int) -> str:
+    """Collection that new knowledge of an access level is written to"""
+    if is_tiered_storage():
+        return settings.tiered_collection_name
+    return knowledge_collection_name(level)
+
+
+def knowledge_collection_names() -> List[str]:
+    """Every knowledge collection used by the configured storage mode"""
+    if is_tiered_storage():
+        return [settings.tiered_collection_name]
+    return [knowledge_collection_name(level) for level in KNOWLEDGE_LEVELS]
+
+
+def collection_profile(name: Optional[str] = None) -> dict:
+    """Settings of a collection profile, the configured one by default"""
+    name = name or settings.collection_profile
+    if name not in settings.collection_profiles:
+        raise ValueError(
+            f"Unknown collection profile '{name}', expected one of "
+            f"{', '.join(settings.collection_profiles)}"
+        )
+    return settings.collection_profiles[name]
+
+
+def quantization_config(profile: dict):
+    """Qdrant quantization of a profile, None when vectors are not quantized"""
+    if profile["quantization"] == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8, quantile=0.99, always_ram=True
+            )
+        )
+    if profile["quantization"] == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def collection_quantization(info) -> Optional[str]:
+    """Quantization a collection actually has ("scalar", "binary", "product" or None)"""
+    vectors = info.config.params.vectors
+    dense = vectors.get("") if isinstance(vectors, dict) else vectors
+    config = dense.quantization_config or info.config.quantization_config
+    if config is None:
+        return None
+    if getattr(config, "scalar", None) is not None:
+        return "scalar"
+    if getattr(config, "binary", None) is not None:
+        return "binary"
+    return "product"
+
+
+def search_params(quantization: Optional[str]) -> Optional[SearchParams]:
+    """Search with the quantized vectors and rescore with the original ones
+
+    The oversampling comes from the configured profile when it uses the
+    same quantization, otherwise from the first profile that does.
+    """
+    if quantization is None:
+        return None
+    profiles = [collection_profile()] + list(settings.collection_profiles.values())
+    oversampling = next(
+        (p["oversampling"] for p in profiles if p["quantization"] == quantization),
+        1.0,
+    )
+    return SearchParams(
+        quantization=QuantizationSearchParams(rescore=True, oversampling=oversampling)
+    )
+
+
+def category_level_filter(category: int) -> Filter:
+    """Filter on the tiered collection for everything a user category may read"""
+    return Filter(
+        must=[FieldCondition(key=CATEGORY_LEVEL_KEY, range=Range(lte=category))]
+    )
+
+
+class VectorStoreRegistry:
+    """Process-wide registry of the Qdrant client and per-collection store handles
+
+    Building a QdrantVectorStore costs a client construction plus a
+    collection-info round trip, so handles are built once and shared by
+    every chat turn and upload. Collections that do not exist are remembered
+    as missing too, so absent levels cost no round trip per turn. Collections
+    created or dropped through the registry refresh their handle
+    automatically, ``refresh`` picks up ones created by another process.
+
+    The sync client serves ingestion, mem0 and the admin commands. Chat
+    retrieval uses the async client so searches do not hold a thread each.
+    """
+
+    def __init__(self):
+        self._client: Optional[QdrantClient] = None
+        self._async_client: Optional[AsyncQdrantClient] = None
+        self._stores: Dict[str, QdrantVectorStore] = {}
+        self._sparse: Dict[str, bool] = {}
+        self._quantization: Dict[str, Optional[str]] = {}
+        self._missing: Set[str] = set()
+        self._lock = threading.RLock()
+
+    @property
+    def client(self) -> QdrantClient:
+        """Shared Qdrant client, its connection (gRPC channel or HTTP pool) is reused by all callers"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = create_qdrant_client()
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncQdrantClient:
+        """Shared async Qdrant client, bound to the event loop it is first used on"""
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    self._async_client = create_async_qdrant_client()
+        return self._async_client
+
+    def get_store(self, collection_name: str) -> Optional[QdrantVectorStore]:
+        """Return the warm handle for a collection, or None if it does not exist"""
+        store = self._stores.get(collection_name)
+        if store is not None or collection_name in self._missing:
+            return store
+
+        with self._lock:
+            store = self._stores.get(collection_name)
+            if store is not None or collection_name in self._missing:
+                return store
+
+            if not self.client.collection_exists(collection_name):
+                self._missing.add(collection_name)
+                return None
+
+            store = QdrantVectorStore(
+                client=self.client,
+                embedding=settings.embedding,
+                collection_name=collection_name,
+            )
+            self._stores[collection_name] = store
+            logger.info(f"Registered vector store handle for {collection_name}")
+            return store
+
+    def _load_collection_info(self, collection_name: str) -> bool:
+        """Cache the sparse vector and quantization setup of a collection
+
+        Returns False when the collection does not exist.
+        """
+        with self._lock:
+            if collection_name in self._sparse:
+                return True
+            if collection_name in self._missing:
+                return False
+            if not self.client.collection_exists(collection_name):
+                self._missing.add(collection_name)
+                return False
+            info = self.client.get_collection(collection_name)
+            sparse = info.config.params.sparse_vectors or {}
+            self._quantization[collection_name] = collection_quantization(info)
+            self._sparse[collection_name] = SPARSE_VECTOR_NAME in sparse
+            return True
+
+    def has_sparse_vectors(self, collection_name: str) -> bool:
+        """Whether a collection stores BM25 sparse vectors (hybrid search capable)
+
+        Collections created before hybrid retrieval existed do not.
+        """
+        supported = self._sparse.get(collection_name)
+        if supported is not None:
+            return supported
+        if not self._load_collection_info(collection_name):
+            return False
+        return self._sparse[collection_name]
+
+    def search_params(self, collection_name: str) -> Optional[SearchParams]:
+        """Rescoring search params for the quantization a collection has, if any"""
+        if collection_name not in self._sparse:
+            if not self._load_collection_info(collection_name):
+                return None
+        return search_params(self._quantization.get(collection_name))
+
+    def create_collection(self, collection_name: str) -> QdrantVectorStore:
+        """Create a collection with the configured profile and return its handle
+
+        Another process (an ingestion worker) may create it first, the
+        collection existing afterwards counts as success.
+        """
+        profile = collection_profile()
+        with self._lock:
+            try:
+                self._create_collection(collection_name, profile)
+            except Exception:
+                self.refresh(collection_name)
+                if not self.client.collection_exists(collection_name):
+                    raise
+                logger.info(f"Collection {collection_name} was created concurrently")
+            self.ensure_payload_indexes(collection_name)
+            self.refresh(collection_name)
+            return self.get_store(collection_name)
+
+    def _create_collection(self, collection_name: str, profile: dict) -> None:
+        self.client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(
+                size=settings.embedding_dims,
+                distance=Distance.COSINE,
+                on_disk=profile["on_disk_vectors"],
+            ),
+            # IDF is computed by Qdrant from the collection statistics
+            sparse_vectors_config={
+                SPARSE_VECTOR_NAME: SparseVectorParams(
+                    index=SparseIndexParams(on_disk=profile["on_disk_vectors"]),
+                    modifier=Modifier.IDF,
+                )
+            },
+            hnsw_config=HnswConfigDiff(
+                m=profile["hnsw_m"], ef_construct=profile["hnsw_ef_construct"]
+            ),
+            quantization_config=quantization_config(profile),
+            on_disk_payload=profile["on_disk_payload"],
+        )
+
+    def apply_profile(self, collection_name: str, profile: dict) -> None:
+        """Switch an existing collection to a profile, Qdrant rebuilds it in the background"""
+        with self._lock:
+            sparse = self.has_sparse_vectors(collection_name)
+            self.client.update_collection(
+                collection_name=collection_name,
+                vectors_config={
+                    "": VectorParamsDiff(on_disk=profile["on_disk_vectors"])
+                },
+                sparse_vectors_config=(
+                    {
+                        SPARSE_VECTOR_NAME: SparseVectorParams(
+                            index=SparseIndexParams(on_disk=profile["on_disk_vectors"]),
+                            modifier=Modifier.IDF,
+                        )
+                    }
+                    if sparse
+                    else None
+                ),
+                hnsw_config=HnswConfigDiff(
+                    m=profile["hnsw_m"], ef_construct=profile["hnsw_ef_construct"]
+                ),
+                quantization_config=(
+                    quantization_config(profile) or Disabled.DISABLED
+                ),
+                collection_params=CollectionParamsDiff(
+                    on_disk_payload=profile["on_disk_payload"]
+                ),
+            )
+            self.ensure_payload_indexes(collection_name)
+            self.refresh(collection_name)
+
+    def ensure_payload_indexes(self, collection_name: str) -> None:
+        """Create the keyword payload indexes (and the tiered level index) if missing"""
+        existing = self.client.get_collection(collection_name).payload_schema or {}
+        indexes = {
+            field: PayloadSchemaType.KEYWORD
+            for field in settings.collection_payload_indexes
+        }
+        if collection_name == settings.tiered_collection_name:
+            # Level filtering is part of every search on the tiered collection
+            indexes[CATEGORY_LEVEL_KEY] = PayloadSchemaType.INTEGER
+
+        for field, schema in indexes.items():
+            if field not in existing:
+                self.client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field,
+                    field_schema=schema,
+                )
+
+    def drop_collection(self, collection_name: str) -> None:
+        """Delete a collection and forget its handle"""
+        with self._lock:
+            self.client.delete_collection(collection_name=collection_name)
+            self.refresh(collection_name)
+
+    def refresh(self, collection_name: Optional[str] = None) -> None:
+        """Forget one handle (or all of them) so it is rebuilt on next use"""
+        with self._lock:
+            if collection_name is None:
+                self._stores.clear()
+                self._sparse.clear()
+                self._quantization.clear()
+                self._missing.clear()
+            else:
+                self._stores.pop(collection_name, None)
+                self._sparse.pop(collection_name, None)
+                self._quantization.pop(collection_name, None)
+                self._missing.discard(collection_name)
+
+    def warm_up(self, collection_names: Iterable[str]) -> None:
+        """Open the client and build handles ahead of the first request"""
+        for collection_name in collection_names:
+            try:
+                if self.get_store(collection_name) is None:
+                    logger.info(f"Collection {collection_name} not found, skipping")
+            except Exception as e:
+                logger.warning(f"Failed to warm up {collection_name}: {e}")
+
+    async def aclose(self) -> None:
+        """Close the async client, then everything ``close`` does"""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        self.close()
+
+    def close(self) -> None:
+        """Drop all handles and close the shared client"""
+        with self._lock:
+            self._stores.clear()
+            self._sparse.clear()
+            self._quantization.clear()
+            self._missing.clear()
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+
+# Global vector store registry instance
+vector_store_registry = VectorStoreRegistry()
@@ -0,0 +1,115 @@
+"""Concurrency check: the same chat requests serially and all at once
+
+Runs N ``/chat`` requests at concurrency 1 and then at concurrency N
+against the fakes of ``benchmarks.fakes`` and fails unless the concurrent
+run is at least ``--min-speedup`` times faster. With an async graph the
+fake model latencies overlap, a blocking call on the event loop makes the
+two runs take about as long.
+
+Usage:
+    python -m benchmarks.concurrency
+    python -m benchmarks.concurrency --requests 20 --llm-latency 0.5 --min-speedup 5
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+
+from benchmarks.run import CHAT_QUESTIONS, drive, install_fakes, seed_knowledge
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=10,
+        help="Requests per run, also the concurrency",
+    )
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--memory-latency", type=float, default=0.02)
+    parser.add_argument(
+        "--min-speedup",
+        type=float,
+        default=3.0,
+        help="Required ratio of the serial to the concurrent wall time",
+    )
+    args = parser.parse_args()
+    # Fixed knobs install_fakes expects
+    args.answer_cache = False
+    args.convert_latency = 0.0
+    args.qdrant = ":memory:"
+    return args
+
+
+async def timed_run(client, total: int, concurrency: int) -> float:
+    """Wall time of ``total`` chat requests with ``concurrency`` in flight"""
+    run_id = f"c{concurrency}-{time.time_ns()}"
+
+    async def request(i: int):
+        response = await client.post(
+            "/api/v1/chat",
+            json={
+                "input": CHAT_QUESTIONS[i % len(CHAT_QUESTIONS)],
+                "category": i % 4 + 1,
+                "user_id": f"concurrency-user-{i}",
+                # Fresh threads, so both runs answer opening questions
+                "thread_id": f"concurrency-{run_id}-{i}",
+                "bypass_cache": True,
+            },
+        )
+        response.raise_for_status()
+
+    started = time.perf_counter()
+    result = await drive(request, total, concurrency)
+    elapsed = time.perf_counter() - started
+    if result["errors"]:
+        raise RuntimeError(
+            f"{result['errors']} requests failed at concurrency {concurrency}"
+        )
+    return elapsed
+
+
+async def run(args: argparse.Namespace) -> float:
+    import httpx
+    from app.main import app, lifespan
+
+    async with lifespan(app):
+        await seed_knowledge()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            # Warm the graph, the caches and the thread pool first
+            await timed_run(client, 1, 1)
+            serial = await timed_run(client, args.requests, 1)
+            concurrent = await timed_run(client, args.requests, args.requests)
+
+    speedup = serial / concurrent
+    print(
+        f"\n{args.requests} chat requests: serial {serial:.2f}s, "
+        f"concurrent {concurrent:.2f}s, speedup {speedup:.1f}x"
+    )
+    return speedup
+
+
+def main():
+    args = parse_args()
+    install_fakes(args, tempfile.mkdtemp(prefix="bejo-concurrency-"))
+    logging.getLogger().setLevel(logging.WARNING)
+
+    speedup = asyncio.run(run(args))
+    if speedup < args.min_speedup:
+        print(f"Speedup below the required {args.min_speedup:.1f}x")
+        sys.exit(1)
+    print(f"Speedup meets the required {args.min_speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
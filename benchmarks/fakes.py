@@ -0,0 +1,167 @@
+"""Deterministic local stand-ins for Gemini, the embedding model, mem0, docling and async Qdrant
+
+Each fake sleeps for a configurable latency so the benchmark measures the
+application's own overhead and concurrency, not Google's API.
+"""
+
+from typing import Any, List, Optional
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+import numpy as np
+import asyncio
+import hashlib
+import time
+import os
+
+FAKE_ANSWER = (
+    "Berdasarkan data yang tersedia, berikut jawaban singkat untuk pertanyaan Anda. "
+    "(Source: benchmark)"
+)
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers with a fixed text after ``latency`` seconds"""
+
+    latency: float = 0.5
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake"
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        input_tokens = sum(_estimate_tokens(str(m.content)) for m in messages)
+        output_tokens = _estimate_tokens(FAKE_ANSWER)
+        message = AIMessage(
+            content=FAKE_ANSWER,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        return self._result(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._result(messages)
+
+
+class FakeEmbeddings(Embeddings):
+    """Unit vectors seeded by the text hash, one ``latency`` sleep per API call"""
+
+    def __init__(self, dims: int, latency: float = 0.05):
+        self.dims = dims
+        self.latency = latency
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dims)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return self._vector(text)
+
+
+class _FakeMemoryStore:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def search(self, query, vectors, limit=100, filters=None) -> list:
+        time.sleep(self.latency)
+        return []
+
+
+class FakeMemory:
+    """The parts of mem0's Memory the app uses, with no stored memories"""
+
+    def __init__(self, latency: float = 0.02):
+        self.latency = latency
+        self.vector_store = _FakeMemoryStore(latency)
+
+    def search(self, query: str, user_id: str, **kwargs) -> dict:
+        time.sleep(self.latency)
+        return {"results": []}
+
+    def add(self, messages, user_id: str, **kwargs) -> dict:
+        time.sleep(self.latency)
+        return {"results": []}
+
+
+class LocalAsyncQdrantClient:
+    """Async facade over a local QdrantClient so both clients see the same data
+
+    Two ``:memory:`` clients would be separate databases and a local path
+    can only be opened once, the calls run on threads instead.
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name: str):
+        method = getattr(self._client, name)
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+        return call
+
+    async def close(self) -> None:
+        pass
+
+
+class _FakeOrigin:
+    def __init__(self, filepath: str):
+        self.filename = os.path.basename(filepath)
+        self.mimetype = "text/plain"
+
+
+class _FakeDoclingDocument:
+    def __init__(self, filepath: str):
+        self._filepath = filepath
+        self.origin = _FakeOrigin(filepath)
+
+    def export_to_markdown(self) -> str:
+        with open(self._filepath, encoding="utf-8", errors="ignore") as f:
+            return f.read()
+
+
+class _FakeConversionResult:
+    def __init__(self, filepath: str):
+        self.document = _FakeDoclingDocument(str(filepath))
+
+
+class FakeDocumentConverter:
+    """Reads the file as text after ``latency`` seconds instead of running docling"""
+
+    latency = 0.2
+
+    def convert(self, source) -> _FakeConversionResult:
+        time.sleep(self.latency)
+        return _FakeConversionResult(source)
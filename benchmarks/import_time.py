@@ -0,0 +1,118 @@
+"""Cold-start guard: time ``import app.main`` in fresh interpreters
+
+Fails when the median import time regresses against the stored baseline,
+or when importing the app loads a module that must stay lazy (Gemini,
+mem0, docling). No Qdrant or API key is needed, importing must not touch
+either.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeats 10 --update-baselines
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.run import BASELINES_PATH
+
+# Heavy modules that are only imported when a model or converter is built
+LAZY_MODULES = ("docling", "mem0", "langchain_google_genai")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+loaded = sorted({name.split(".")[0] for name in sys.modules} & set(json.loads(sys.argv[1])))
+print(json.dumps({"seconds": elapsed, "loaded": loaded}))
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baselines", default=BASELINES_PATH)
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    return parser.parse_args()
+
+
+def measure_once() -> dict:
+    env = dict(os.environ)
+    env["BEJO_DATA_DIR"] = tempfile.mkdtemp(prefix="bejo-import-")
+    env.setdefault("GOOGLE_API_KEY", "benchmark")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, json.dumps(LAZY_MODULES)],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    args = parse_args()
+
+    # The first run warms the OS file cache and is not counted
+    measure_once()
+    runs = [measure_once() for _ in range(args.repeats)]
+    seconds = sorted(run["seconds"] for run in runs)
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+    result = {
+        "median": round(statistics.median(seconds), 4),
+        "max": round(seconds[-1], 4),
+    }
+    print(f"import app.main: median {result['median']:.3f}s, max {result['max']:.3f}s")
+
+    failures = []
+    if loaded:
+        failures.append(f"importing the app loaded {', '.join(loaded)}")
+
+    config = {"repeats": args.repeats, "python": sys.version.split()[0]}
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines, encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    if args.update_baselines:
+        baselines["import"] = {"config": config, "results": result}
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2)
+            f.write("\n")
+        print(f"Baselines written to {args.baselines}")
+    else:
+        baseline = baselines.get("import")
+        if baseline is None:
+            print("No import baseline stored, run with --update-baselines to create it")
+        elif baseline["config"] != config:
+            print(
+                "Import baseline was recorded with a different configuration, "
+                "skipping comparison"
+            )
+        else:
+            limit = baseline["results"]["median"] * (1 + args.tolerance)
+            if result["median"] > limit:
+                failures.append(
+                    f"median import {result['median']:.3f}s > {limit:.3f}s "
+                    f"(baseline {baseline['results']['median']:.3f}s)"
+                )
+
+    if failures:
+        print("Cold-start regressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("No cold-start regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""Offline load benchmark for the chat and upload endpoints
+
+Runs the real FastAPI app in-process against an in-process Qdrant, with
+Gemini, the embedding model, mem0 and docling replaced by fakes of
+configurable latency. Reports p50/p95/p99 latency and throughput per
+scenario and fails when a result regresses against the stored baselines.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --scenario chat --requests 200 --concurrency 16
+    python -m benchmarks.run --llm-latency 1.0 --qdrant /tmp/bejo-bench-qdrant
+    python -m benchmarks.run --update-baselines
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+# Compared against the baselines, latency is lower-is-better, throughput higher
+LATENCY_METRICS = ("p50", "p95", "p99")
+
+SEED_DOCUMENT = """# Prosedur Operasional Gudang
+
+Setiap penerimaan barang wajib dicatat pada sistem WMS paling lambat satu jam
+setelah kedatangan. Nomor dokumen penerimaan mengikuti format GR-YYYY-NNNN.
+
+## Pengiriman
+
+Barang dengan prioritas tinggi dikirim dengan armada internal. Permintaan
+pengiriman diajukan melalui formulir DO dan disetujui oleh kepala gudang.
+
+## Retur
+
+Retur dari pelanggan diperiksa oleh tim QC dalam dua hari kerja. Barang
+rusak dipisahkan ke area karantina dengan label merah.
+"""
+
+CHAT_QUESTIONS = [
+    "Bagaimana prosedur penerimaan barang di gudang?",
+    "Siapa yang menyetujui permintaan pengiriman?",
+    "Berapa lama pemeriksaan retur oleh tim QC?",
+    "Apa format nomor dokumen penerimaan?",
+    "Di mana barang rusak disimpan?",
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--scenario", choices=["chat", "upload", "all"], default="all"
+    )
+    parser.add_argument(
+        "--requests", type=int, default=50, help="Requests per scenario"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Requests in flight at once"
+    )
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--memory-latency", type=float, default=0.02)
+    parser.add_argument("--convert-latency", type=float, default=0.1)
+    parser.add_argument(
+        "--upload-size-kb", type=int, default=16, help="Size of each uploaded file"
+    )
+    parser.add_argument(
+        "--qdrant",
+        default=":memory:",
+        help='In-process Qdrant location, ":memory:" or a local directory',
+    )
+    parser.add_argument(
+        "--answer-cache",
+        action="store_true",
+        help="Let /chat use the semantic answer cache (off: every turn runs the graph)",
+    )
+    parser.add_argument("--baselines", default=BASELINES_PATH)
+    parser.add_argument(
+        "--update-baselines",
+        action="store_true",
+        help="Store this run's results as the new baselines",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed relative regression before the run fails",
+    )
+    return parser.parse_args()
+
+
+def install_fakes(args: argparse.Namespace, data_dir: str) -> None:
+    """Point the app at local fakes, must run before ``app.main`` is imported
+
+    The models are built on first use, setting them on the settings instance
+    first means Gemini and mem0 are never constructed.
+    """
+    os.environ["BEJO_DATA_DIR"] = data_dir
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+    os.environ["ANSWER_CACHE_ENABLED"] = "true" if args.answer_cache else "false"
+
+    from qdrant_client import QdrantClient
+    from app.config.settings import settings
+    from app.services import ingestion_jobs
+    from app.services.embedding_cache import CachedEmbeddings
+    from app.services.ingestion_components import ingestion_components
+    from app.services.upload_store import upload_store
+    from app.services.vector_store import vector_store_registry
+    from benchmarks.fakes import (
+        FakeChatModel,
+        FakeDocumentConverter,
+        FakeEmbeddings,
+        FakeMemory,
+        LocalAsyncQdrantClient,
+    )
+
+    settings.llm = FakeChatModel(latency=args.llm_latency)
+    # Keep the cache tiers, only the model behind them is faked
+    settings.embedding = CachedEmbeddings(
+        FakeEmbeddings(settings.embedding_dims, latency=args.embedding_latency),
+        model_name=settings.embedding_model,
+        db_path=os.path.join(data_dir, "embeddings.sqlite3"),
+        max_memory_items=settings.embedding_cache_memory_items,
+    )
+    settings.memory = FakeMemory(latency=args.memory_latency)
+    if args.qdrant == ":memory:":
+        vector_store_registry._client = QdrantClient(location=":memory:")
+    else:
+        vector_store_registry._client = QdrantClient(path=args.qdrant)
+    vector_store_registry._async_client = LocalAsyncQdrantClient(
+        vector_store_registry._client
+    )
+
+    FakeDocumentConverter.latency = args.convert_latency
+    ingestion_components._build_converter = FakeDocumentConverter
+    upload_store.root = os.path.join(data_dir, "uploads")
+
+    # Spawned workers would import the app without the fakes, ingestion
+    # jobs run on threads of this process instead
+    def thread_pool(max_workers=None, mp_context=None, initializer=None):
+        return ThreadPoolExecutor(max_workers=max_workers, initializer=initializer)
+
+    ingestion_jobs.ProcessPoolExecutor = thread_pool
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    """Latency percentiles in seconds and completed requests per second"""
+    values = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50": round(float(np.percentile(values, 50)), 4),
+        "p95": round(float(np.percentile(values, 95)), 4),
+        "p99": round(float(np.percentile(values, 99)), 4),
+        "throughput": round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+    }
+
+
+async def drive(request, total: int, concurrency: int) -> Dict[str, float]:
+    """Run ``request(i)`` for i in range(total) with ``concurrency`` in flight"""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                await request(i)
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors += 1
+                logging.getLogger(__name__).warning(f"Request {i} failed: {e}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def seed_knowledge() -> None:
+    """Index one document per level so retrieval has something to find"""
+    from app.services.add_knowledge import add_knowledge
+
+    for level in range(1, 5):
+        path = os.path.join(tempfile.mkdtemp(), f"seed-level-{level}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(SEED_DOCUMENT)
+        async for event in add_knowledge(path, f"seed-level-{level}.md", level):
+            if event.get("error"):
+                raise RuntimeError(f"Seeding failed: {event['message']}")
+
+
+async def chat_scenario(client, args: argparse.Namespace) -> Dict[str, float]:
+    async def request(i: int):
+        response = await client.post(
+            "/api/v1/chat",
+            json={
+                "input": CHAT_QUESTIONS[i % len(CHAT_QUESTIONS)],
+                "category": i % 4 + 1,
+                "user_id": f"bench-user-{i % args.concurrency}",
+                "thread_id": f"bench-thread-{i}",
+                "bypass_cache": not args.answer_cache,
+            },
+        )
+        response.raise_for_status()
+
+    return await drive(request, args.requests, args.concurrency)
+
+
+def _upload_bytes(i: int, size_kb: int) -> bytes:
+    header = f"# Dokumen benchmark {i}\n\n".encode("utf-8")
+    line = f"Baris {i}: {SEED_DOCUMENT.splitlines()[2]}\n".encode("utf-8")
+    body = line * (size_kb * 1024 // len(line) + 1)
+    return header + body[: size_kb * 1024]
+
+
+async def upload_scenario(client, args: argparse.Namespace) -> Dict[str, float]:
+    """Upload unique files and wait for each ingestion job to finish"""
+    run_id = int(time.time())
+
+    async def request(i: int):
+        response = await client.post(
+            "/api/v1/upload",
+            data={"category_level": str(i % 4 + 1)},
+            files={
+                "file": (
+                    f"bench-{run_id}-{i}.md",
+                    _upload_bytes(i, args.upload_size_kb),
+                    "text/markdown",
+                )
+            },
+        )
+        response.raise_for_status()
+        job = response.json()
+        if "status_url" not in job:
+            raise RuntimeError(job.get("message", "upload was not accepted"))
+
+        while True:
+            status = (await client.get(job["status_url"])).json()
+            if status["status"] == "completed":
+                return
+            if status["status"] in ("failed", "cancelled"):
+                raise RuntimeError(f"Job {job['job_id']} {status['status']}")
+            await asyncio.sleep(0.05)
+
+    return await drive(request, args.requests, args.concurrency)
+
+
+def run_config(args: argparse.Namespace) -> dict:
+    """The knobs a baseline is only comparable under"""
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "llm_latency": args.llm_latency,
+        "embedding_latency": args.embedding_latency,
+        "memory_latency": args.memory_latency,
+        "convert_latency": args.convert_latency,
+        "upload_size_kb": args.upload_size_kb,
+        "answer_cache": args.answer_cache,
+    }
+
+
+def compare(results: dict, baselines: dict, config: dict, tolerance: float) -> List[str]:
+    """Regressions of ``results`` against ``baselines``, as readable lines"""
+    regressions = []
+    for scenario, result in results.items():
+        baseline = baselines.get(scenario)
+        if baseline is None:
+            print(f"No baseline for {scenario}, skipping comparison")
+            continue
+        if baseline["config"] != config:
+            print(
+                f"Baseline for {scenario} was recorded with a different "
+                f"configuration, skipping comparison"
+            )
+            continue
+
+        expected = baseline["results"]
+        for metric in LATENCY_METRICS:
+            limit = expected[metric] * (1 + tolerance)
+            if result[metric] > limit:
+                regressions.append(
+                    f"{scenario} {metric}: {result[metric]:.3f}s > {limit:.3f}s "
+                    f"(baseline {expected[metric]:.3f}s)"
+                )
+        limit = expected["throughput"] * (1 - tolerance)
+        if result["throughput"] < limit:
+            regressions.append(
+                f"{scenario} throughput: {result['throughput']:.2f}/s < {limit:.2f}/s "
+                f"(baseline {expected['throughput']:.2f}/s)"
+            )
+        if result["errors"] > expected["errors"]:
+            regressions.append(
+                f"{scenario} errors: {result['errors']} > {expected['errors']}"
+            )
+    return regressions
+
+
+def print_report(results: dict) -> None:
+    print(
+        f"\n{'scenario':<10}{'requests':>10}{'errors':>8}{'p50':>9}{'p95':>9}"
+        f"{'p99':>9}{'req/s':>9}"
+    )
+    for scenario, r in results.items():
+        print(
+            f"{scenario:<10}{r['requests']:>10}{r['errors']:>8}{r['p50']:>9.3f}"
+            f"{r['p95']:>9.3f}{r['p99']:>9.3f}{r['throughput']:>9.2f}"
+        )
+    print()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+    from app.main import app, lifespan
+
+    scenarios = ["chat", "upload"] if args.scenario == "all" else [args.scenario]
+    results = {}
+
+    async with lifespan(app):
+        await seed_knowledge()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            for scenario in scenarios:
+                print(f"Running {scenario} scenario...")
+                if scenario == "chat":
+                    results[scenario] = await chat_scenario(client, args)
+                else:
+                    results[scenario] = await upload_scenario(client, args)
+    return results
+
+
+def main():
+    args = parse_args()
+    data_dir = tempfile.mkdtemp(prefix="bejo-bench-")
+    install_fakes(args, data_dir)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = asyncio.run(run(args))
+    print_report(results)
+
+    config = run_config(args)
+    if args.update_baselines:
+        baselines = {}
+        if os.path.exists(args.baselines):
+            with open(args.baselines, encoding="utf-8") as f:
+                baselines = json.load(f)
+        for scenario, result in results.items():
+            baselines[scenario] = {"config": config, "results": result}
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2)
+            f.write("\n")
+        print(f"Baselines written to {args.baselines}")
+        return
+
+    if not os.path.exists(args.baselines):
+        print("No baselines stored, run with --update-baselines to create them")
+        return
+
+    with open(args.baselines, encoding="utf-8") as f:
+        baselines = json.load(f)
+
+    regressions = compare(results, baselines, config, args.tolerance)
+    if regressions:
+        print("Performance regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("No regressions against the baselines")
+
+
+if __name__ == "__main__":
+    main()